@@ -0,0 +1,254 @@
+"""
+Headless benchmarks for the state.py and dx7_bridge hot paths.
+Needs only numpy and python-osc (no window, GLFW or imgui):
+
+    cd Project
+    python benchmarks/bench_hotpaths.py --quick
+    python benchmarks/bench_hotpaths.py --compare benchmarks/results/<older run>.json
+
+Every run is written to JSON (one record per benchmark and size) so runs from
+different commits can be compared with --compare.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+import state as S
+import dx7_bridge
+
+RESULTS_DIR = os.path.join(PROJECT_DIR, "benchmarks", "results")
+
+FULL_SIZES = {"V": [10, 1_000, 100_000, 1_000_000], "D": [10, 100, 1_000], "patches": [10, 1_000, 10_000]}
+QUICK_SIZES = {"V": [10, 1_000, 10_000], "D": [10, 100], "patches": [10, 1_000]}
+
+
+# ---------- timing ----------
+def measure(fn, repeat=5, min_time=0.02, max_number=10_000):
+    """
+    Time fn() like timeit: the call count per repeat grows until one repeat takes min_time.
+    Returns best/median seconds per call.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= max_number:
+            break
+        number = min(max_number, number * max(2, int(min_time / max(elapsed, 1e-9))))
+
+    times = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return {"best_s": min(times), "median_s": float(np.median(times)), "number": number, "repeat": repeat}
+
+
+# ---------- synthetic data ----------
+def build_space(V, D, seed=0):
+    """Fill the global state with V random presets over D parameters, through the state.py API."""
+    rng = np.random.default_rng(seed)
+    S.init_space([f"param{i}" for i in range(D - 1)])
+    S.add_parameter(f"param{D - 1}", 0.0, 1.0)
+
+    lo = rng.uniform(-10.0, 0.0, D)
+    S.set_bounds(lo, lo + rng.uniform(0.5, 100.0, D))
+
+    names = [f"preset {i}" for i in range(V)]
+    colors = rng.integers(0, 256, (V, 3))
+    S.add_presets(names, colors, S.from_unit(rng.random((V, D)), S.mins, S.maxs))
+
+    # A generic oblique plane through the middle of the cube
+    Q, _ = np.linalg.qr(rng.normal(size=(D, 2)))
+    S.set_basis(Q.T, np.full(D, 0.5))
+
+def write_dx7_json(path, n_patches, seed=0):
+    """Write a converted-library JSON with n_patches random patches inside the default bounds."""
+    rng = np.random.default_rng(seed)
+    spec = dx7_bridge.DEFAULT_DX7_SPEC
+    def value(rng_range):
+        return float(rng.uniform(*rng_range))
+
+    patches = []
+    for i in range(n_patches):
+        glob = {k: value(spec["global"][k]["range"]) for k in dx7_bridge.GLOBAL_KEYS}
+        glob["algorithm_matrix"] = [value(spec["global"]["wiring"]["range"]) for _ in range(dx7_bridge.SIZE_MATRIX)]
+        glob["output_mixer"] = [float(x) for x in rng.integers(0, 2, dx7_bridge.SIZE_MIXER)]
+        glob["pitch_eg_levels"] = [value(spec["global"]["pitch_eg_levels"]["range"]) for _ in range(dx7_bridge.SIZE_PEG)]
+        operators = []
+        for op_id in range(6, 0, -1):
+            env = spec["operator"]["envelope"][0]
+            operators.append({
+                "id": op_id,
+                "frequency_ratio_mode": value(spec["operator"]["frequency_ratio_mode"]["range"]),
+                "frequency_fixed_mode": None,
+                "detune": value(spec["operator"]["detune"]["range"]),
+                "envelope": [
+                    {"stage": s, "rate": value(env["rate"]["range"]), "level": value(env["level"]["range"])}
+                    for s in range(1, 5)
+                ],
+            })
+        patches.append({"identity": {"name": f"PATCH {i}", "slot": i % 32 + 1}, "global": glob, "operators": operators})
+
+    with open(path, "w") as f:
+        json.dump({"meta": {"patch_count": n_patches}, "patches": patches}, f)
+
+
+# ---------- benchmarks ----------
+def bench_space(V, D, record):
+    build_space(V, D)
+    rng = np.random.default_rng(1)
+    basis, origin = S.Basis, S.Slice_origin
+
+    def add_preset():
+        S.add_preset("bench", (255, 255, 255), S.Presets[0])
+    record("add_preset", V, D, measure(add_preset, repeat=3, max_number=1_000))
+    build_space(V, D)
+
+    def project_cold():
+        S.set_basis(basis, origin)
+        S.get_presets_on_plane()
+    record("get_presets_on_plane/new_basis", V, D, measure(project_cold))
+
+    def project_one_edit():
+        S.update_preset_parameter_index(V // 2, D // 2, S.Presets[V // 2, D // 2])
+        S.get_presets_on_plane()
+    record("get_presets_on_plane/one_dirty_row", V, D, measure(project_one_edit))
+
+    def polygon_cold():
+        S.set_basis(basis, origin)
+        S.get_slice_polygon_vertices()
+    record("get_slice_polygon_vertices/new_basis", V, D, measure(polygon_cold))
+    record("get_slice_polygon_vertices/cached", V, D, measure(S.get_slice_polygon_vertices))
+
+    start = np.full(D, 0.5)
+    end = start + rng.normal(scale=0.5, size=D)
+    record("clamp_movement", V, D, measure(lambda: S.clamp_movement(start, end)))
+
+    unit = np.array(S.get_unit_presets(), dtype=float)
+    record("pca_basis", V, D, measure(lambda: S.pca_basis(unit, dim=2), repeat=3))
+
+def bench_loader(n_patches, tmp_dir, record):
+    path = os.path.join(tmp_dir, f"library_{n_patches}.json")
+    write_dx7_json(path, n_patches)
+    D = len(dx7_bridge.build_dx7_schema()[0])
+
+    record("load_dx7_json/no_cache", n_patches, D,
+           measure(lambda: dx7_bridge.load_dx7_json(path, use_cache=False), repeat=3, max_number=100))
+    dx7_bridge.load_dx7_json(path)  # writes the cache
+    record("load_dx7_json/cached", n_patches, D,
+           measure(lambda: dx7_bridge.load_dx7_json(path), repeat=3, max_number=100))
+
+def bench_osc(record):
+    # Local UDP sink so packets really leave through the socket
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.bind(("127.0.0.1", 0))
+    sink.setblocking(False)
+
+    def drain():
+        try:
+            while True:
+                sink.recv(65536)
+        except BlockingIOError:
+            pass
+
+    dims, mins, maxs = dx7_bridge.build_dx7_schema()
+    vector = S.from_unit(np.random.default_rng(2).random(len(dims)), np.array(mins), np.array(maxs))
+    client = dx7_bridge.DX7OSCClient(ip="127.0.0.1", port=sink.getsockname()[1])
+
+    def send():
+        client.send_active_preset(vector, force=True)
+        drain()
+    record("send_active_preset/forced", 1, len(dims), measure(send))
+    record("send_active_preset/unchanged", 1, len(dims), measure(lambda: client.send_active_preset(vector)))
+    sink.close()
+
+
+# ---------- reporting ----------
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path):
+    """Print per-benchmark speed ratios against an earlier results file."""
+    with open(baseline_path) as f:
+        baseline = {(r["name"], r["V"], r["D"]): r for r in json.load(f)["results"]}
+    print(f"\nvs {baseline_path} (>1 = faster now)")
+    for r in results:
+        old = baseline.get((r["name"], r["V"], r["D"]))
+        if old:
+            print(f"  {r['name']:<42} V={r['V']:<9} D={r['D']:<6} {old['best_s'] / r['best_s']:8.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="small sizes only")
+    parser.add_argument("--max-elements", type=float, default=5e7,
+                        help="skip spaces with more than V*D values (default 5e7, ~400 MB of float64)")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--float32", action="store_true", help="store presets in float32 (state.set_float32)")
+    args = parser.parse_args()
+    if args.float32:
+        S.set_float32()
+
+    sizes = QUICK_SIZES if args.quick else FULL_SIZES
+    results = []
+
+    def record(name, V, D, timing):
+        results.append({"name": name, "V": V, "D": D, **timing})
+        print(f"{name:<42} V={V:<9} D={D:<6} best {timing['best_s'] * 1e3:10.4f} ms")
+
+    for D in sizes["D"]:
+        for V in sizes["V"]:
+            if V * D > args.max_elements:
+                print(f"{'(skipped)':<42} V={V:<9} D={D:<6} over --max-elements")
+                continue
+            bench_space(V, D, record)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_patches in sizes["patches"]:
+            bench_loader(n_patches, tmp_dir, record)
+
+    bench_osc(record)
+
+    commit = git_commit()
+    meta = {
+        "commit": commit,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "float32": args.float32,
+    }
+    suffix = ("-quick" if args.quick else "") + ("-float32" if args.float32 else "")
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit or 'unknown'}{suffix}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,16 @@ DX7 Parameter Bridge & OSC Communication.
 Handles loading presets and sending parameters via Open Sound Control.
 """
 
+import os
 import json
+import time
+import socket
+import threading
 import numpy as np
 import hashlib
 from pythonosc import udp_client
 import state as S
+import profiler
 
 # =============================================================================
 # 1. SHARED SCHEMA CONFIGURATION
@@ -77,18 +82,13 @@ def get_color_from_name(name):
     b = ((hash_val >> 16) & 0xFF)
     return ((r + 255) // 2, (g + 255) // 2, (b + 255) // 2)
 
-def load_dx7_json(file_path):
+def build_dx7_schema(spec=DEFAULT_DX7_SPEC):
     """
-    Parses a JSON file containing DX7 parameter specifications and patches.
-    Populates the global state (state.py) with dimensions, bounds, and presets.
+    Builds the flat vector layout (names and bounds) described by a DX7 parameter spec.
     
-    Args:
-        file_path (str): Path to the JSON file to load.
+    Returns:
+        tuple: (dims, mins, maxs) as plain lists, in the order the OSC sender expects.
     """
-    with open(file_path, 'r') as f:
-        data = json.load(f)
-
-    spec = data.get("dx7_parameter_spec", DEFAULT_DX7_SPEC)
     glob_spec = spec.get("global", DEFAULT_DX7_SPEC["global"])
     op_spec = spec.get("operator", DEFAULT_DX7_SPEC["operator"])
 
@@ -147,12 +147,98 @@ def load_dx7_json(file_path):
                 dims.append(f"{prefix}_eg_level_{stage}")
                 mins.append(l_min); maxs.append(l_max)
 
+    return dims, mins, maxs
+
+# -----------------------------------------------------------------------------
+# Binary startup cache
+# -----------------------------------------------------------------------------
+# Parsed libraries are stored as an uncompressed .npz next to the source file,
+# keyed by the source's content hash, so unchanged libraries skip JSON parsing.
+CACHE_DIR = ".cache"
+CACHE_VERSION = 2  # bump when the parser output changes (2: presets always stored as parsed, in float64)
+
+def get_cache_path(file_path):
+    folder, name = os.path.split(os.path.abspath(file_path))
+    return os.path.join(folder, CACHE_DIR, name + ".npz")
+
+def load_cache(cache_path, source_hash) -> bool:
+    """
+    Restores the global state from a cache file if it was built from the same source.
+    Returns False (leaving the state untouched) on a miss or an unreadable cache.
+    """
+    try:
+        with np.load(cache_path, allow_pickle=False) as cached:
+            if str(cached["source_hash"]) != source_hash or int(cached["version"]) != CACHE_VERSION:
+                return False
+            param_names = cached["param_names"].tolist()
+            names = cached["preset_names"].tolist()
+            colors = cached["preset_colors"]
+            mins = cached["mins"]
+            maxs = cached["maxs"]
+            presets = cached["presets"]
+    except (OSError, KeyError, ValueError):
+        return False
+
+    S.init_space(param_names)
+    S.set_bounds(mins, maxs)
+    S.add_presets(names, colors, presets)
+    return True
+
+def save_cache(cache_path, source_hash, presets):
+    """
+    Writes the current global state to a cache file. Failures only print a warning.
+    presets: the parsed values at full precision; state may hold them rounded to float32.
+    """
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                source_hash=np.array(source_hash),
+                version=np.array(CACHE_VERSION),
+                param_names=np.array(S.param_names, dtype=str),
+                preset_names=np.array(S.preset_names, dtype=str),
+                preset_colors=S.preset_colors,
+                mins=S.mins,
+                maxs=S.maxs,
+                presets=np.asarray(presets, dtype=np.float64),
+            )
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"[Warning] Could not write library cache '{cache_path}': {e}")
+
+def load_dx7_json(file_path, use_cache=True):
+    """
+    Parses a JSON file containing DX7 parameter specifications and patches.
+    Populates the global state (state.py) with dimensions, bounds, and presets.
+    Unchanged files are restored from the binary startup cache instead of being parsed.
+    
+    Args:
+        file_path (str): Path to the JSON file to load.
+        use_cache (bool): Read and write the startup cache.
+    """
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+
+    source_hash = hashlib.sha256(raw).hexdigest()
+    cache_path = get_cache_path(file_path)
+    if use_cache and load_cache(cache_path, source_hash):
+        return
+
+    data = json.loads(raw)
+
+    spec = data.get("dx7_parameter_spec", DEFAULT_DX7_SPEC)
+    dims, mins, maxs = build_dx7_schema(spec)
+
     # Init State
     S.init_space(dims)
-    S.mins = np.array(mins, dtype=float)
-    S.maxs = np.array(maxs, dtype=float)
+    S.set_bounds(np.array(mins, dtype=float), np.array(maxs, dtype=float))
 
     # Parse Vectors
+    names = []
+    colors = []
+    vectors = []
     for p in data.get("patches", []):
         vector = []
         p_glob = p.get("global", {})
@@ -161,7 +247,7 @@ def load_dx7_json(file_path):
 
         # Global
         for k in GLOBAL_KEYS:
-            val = p_glob.get(k, S.mins[dims.index(k)] if k in dims else 0.0)
+            val = p_glob.get(k, S.mins[S.param_index[k]] if k in S.param_index else 0.0)
             vector.append(float(val))
 
         vector.extend([float(x) for x in p_glob.get("algorithm_matrix", [0.0]*SIZE_MATRIX)])
@@ -177,7 +263,7 @@ def load_dx7_json(file_path):
                 val = curr_op.get(k)
                 if val is None:
                     dim_name = f"op{op_id}_{k}"
-                    val = S.mins[dims.index(dim_name)] if dim_name in dims else 0.0
+                    val = S.mins[S.param_index[dim_name]] if dim_name in S.param_index else 0.0
                 vector.append(float(val))
 
             env_list = curr_op.get("envelope", [])
@@ -186,97 +272,462 @@ def load_dx7_json(file_path):
                 vector.append(float(stage_data['rate']))
                 vector.append(float(stage_data['level']))
 
-        col_tuple = get_color_from_name(p_name)
+        names.append(p_name)
+        colors.append(get_color_from_name(p_name))
+        vectors.append(vector)
+
+    values = np.array(vectors, dtype=float).reshape(len(vectors), len(dims))
+
+    # Validate bounds before adding (all patches at once)
+    # Use a small epsilon for floating point comparisons
+    out_of_bounds = (values < S.mins - 1e-5) | (values > S.maxs + 1e-5)
+    if out_of_bounds.any():
+        row, idx = np.argwhere(out_of_bounds)[0]
+        param = S.param_names[idx]
+        val = values[row, idx]
+        mn, mx = S.mins[idx], S.maxs[idx]
+        raise AssertionError(f"Preset '{names[row]}' param '{param}' value {val} is out of bounds [{mn}, {mx}]")
+
+    S.add_presets(names, colors, values)
+
+    if use_cache:
+        save_cache(cache_path, source_hash, values)
+
+
+# -----------------------------------------------------------------------------
+# Native DX7 SysEx banks (.syx)
+# -----------------------------------------------------------------------------
+# A 32-voice bulk dump is 4104 bytes: a 6 byte header (F0 43 0n 09 20 00),
+# 32 packed voices of 128 bytes, a checksum byte and F7.
+SYX_BANK_SIZE = 4104
+SYX_VOICE_SIZE = 128
+SYX_VOICES_PER_BANK = 32
+SYX_DATA_OFFSET = 6
+SYX_OP_SIZE = 17  # packed bytes per operator (op6 first)
+
+# The 32 DX7 algorithms as (modulator -> target) pairs, the feedback (from -> into)
+# and the carriers. Operators are numbered 1..6 like on the synth.
+DX7_ALGORITHMS = [
+    ([(2, 1), (4, 3), (5, 4), (6, 5)],         (6, 6), (1, 3)),
+    ([(2, 1), (4, 3), (5, 4), (6, 5)],         (2, 2), (1, 3)),
+    ([(2, 1), (3, 2), (5, 4), (6, 5)],         (6, 6), (1, 4)),
+    ([(2, 1), (3, 2), (5, 4), (6, 5)],         (4, 6), (1, 4)),
+    ([(2, 1), (4, 3), (6, 5)],                 (6, 6), (1, 3, 5)),
+    ([(2, 1), (4, 3), (6, 5)],                 (5, 6), (1, 3, 5)),
+    ([(2, 1), (4, 3), (5, 3), (6, 5)],         (6, 6), (1, 3)),
+    ([(2, 1), (4, 3), (5, 3), (6, 5)],         (4, 4), (1, 3)),
+    ([(2, 1), (4, 3), (5, 3), (6, 5)],         (2, 2), (1, 3)),
+    ([(2, 1), (3, 2), (5, 4), (6, 4)],         (3, 3), (1, 4)),
+    ([(2, 1), (3, 2), (5, 4), (6, 4)],         (6, 6), (1, 4)),
+    ([(2, 1), (4, 3), (5, 3), (6, 3)],         (2, 2), (1, 3)),
+    ([(2, 1), (4, 3), (5, 3), (6, 3)],         (6, 6), (1, 3)),
+    ([(2, 1), (4, 3), (5, 4), (6, 4)],         (6, 6), (1, 3)),
+    ([(2, 1), (4, 3), (5, 4), (6, 4)],         (2, 2), (1, 3)),
+    ([(2, 1), (3, 1), (5, 1), (4, 3), (6, 5)], (6, 6), (1,)),
+    ([(2, 1), (3, 1), (5, 1), (4, 3), (6, 5)], (2, 2), (1,)),
+    ([(2, 1), (3, 1), (4, 1), (5, 4), (6, 5)], (3, 3), (1,)),
+    ([(2, 1), (3, 2), (6, 4), (6, 5)],         (6, 6), (1, 4, 5)),
+    ([(3, 1), (3, 2), (5, 4), (6, 4)],         (3, 3), (1, 2, 4)),
+    ([(3, 1), (3, 2), (6, 4), (6, 5)],         (3, 3), (1, 2, 4, 5)),
+    ([(2, 1), (6, 3), (6, 4), (6, 5)],         (6, 6), (1, 3, 4, 5)),
+    ([(3, 2), (6, 4), (6, 5)],                 (6, 6), (1, 2, 4, 5)),
+    ([(6, 3), (6, 4), (6, 5)],                 (6, 6), (1, 2, 3, 4, 5)),
+    ([(6, 4), (6, 5)],                         (6, 6), (1, 2, 3, 4, 5)),
+    ([(3, 2), (5, 4), (6, 4)],                 (6, 6), (1, 2, 4)),
+    ([(3, 2), (5, 4), (6, 4)],                 (3, 3), (1, 2, 4)),
+    ([(2, 1), (4, 3), (5, 4)],                 (5, 5), (1, 3, 6)),
+    ([(4, 3), (6, 5)],                         (6, 6), (1, 2, 3, 5)),
+    ([(4, 3), (5, 4)],                         (5, 5), (1, 2, 3, 6)),
+    ([(6, 5)],                                 (6, 6), (1, 2, 3, 4, 5)),
+    ([],                                       (6, 6), (1, 2, 3, 4, 5, 6)),
+]
 
-        # Validate bounds before adding
-        v_arr = np.array(vector)
-        # Use a small epsilon for floating point comparisons
-        violations = np.where((v_arr < S.mins - 1e-5) | (v_arr > S.maxs + 1e-5))[0]
-        if len(violations) > 0:
-            idx = violations[0]
-            param = S.param_names[idx]
-            val = v_arr[idx]
-            mn, mx = S.mins[idx], S.maxs[idx]
-            raise AssertionError(f"Preset '{p_name}' param '{param}' value {val} is out of bounds [{mn}, {mx}]")
+def _build_algorithm_tables():
+    """Turns DX7_ALGORITHMS into lookup arrays indexed by algorithm number (0..31)."""
+    mod_mask = np.zeros((32, 6, 6))  # [alg, target, modulator], same layout as "algorithm_matrix"
+    fb_mask = np.zeros((32, 6, 6))
+    carriers = np.zeros((32, 6))
+    for alg, (mods, (fb_from, fb_into), outs) in enumerate(DX7_ALGORITHMS):
+        for src, dst in mods:
+            mod_mask[alg, dst - 1, src - 1] = 1.0
+        fb_mask[alg, fb_into - 1, fb_from - 1] = 1.0
+        carriers[alg, [op - 1 for op in outs]] = 1.0
+    return mod_mask, fb_mask, carriers
+
+ALG_MOD_MASK, ALG_FB_MASK, ALG_CARRIERS = _build_algorithm_tables()
+
+# Largest modulation index (output level 99), matches the top of the "wiring" range.
+MAX_MOD_INDEX = 4 * np.pi
+# Seconds an envelope stage takes at rate 0; every 6 rate steps halves it.
+EG_SLOWEST_TIME = 9.9
+
+def _level_to_gain(level):
+    """DX7 0..99 level -> linear gain. Each step is ~0.75 dB, 0 is silence."""
+    return np.where(level > 0, 2.0 ** ((level - 99) / 8.0), 0.0)
+
+def decode_syx_voices(voices: np.ndarray, mins: np.ndarray, maxs: np.ndarray) -> np.ndarray:
+    """
+    Converts packed DX7 voices into flat parameter vectors, all voices at once.
+    
+    Args:
+        voices (np.ndarray): (N, 128) uint8 packed voice data.
+        mins, maxs (np.ndarray): Bounds of the default schema; results are clipped to them.
+    Returns:
+        np.ndarray: (N, D) vectors in the build_dx7_schema() layout.
+    """
+    voices = (voices & 0x7F).astype(float)
+    N = voices.shape[0]
+
+    # --- Operators, stored op6 -> op1 exactly like the flat vector ---
+    ops = voices[:, :6 * SYX_OP_SIZE].reshape(N, 6, SYX_OP_SIZE)
+    rates = np.minimum(ops[:, :, 0:4], 99)
+    levels = np.minimum(ops[:, :, 4:8], 99)
+    detune = (ops[:, :, 12].astype(np.uint8) >> 3) & 0x0F
+    out_level = np.minimum(ops[:, :, 14], 99)
+    osc_byte = ops[:, :, 15].astype(np.uint8)
+    fixed_mode = (osc_byte & 0x01) == 1
+    coarse = (osc_byte >> 1) & 0x1F
+    fine = np.minimum(ops[:, :, 16], 99)
+
+    # --- Voice globals ---
+    peg_levels = np.minimum(voices[:, 106:110], 99)
+    algorithm = voices[:, 110].astype(int) & 0x1F
+    feedback = voices[:, 111].astype(np.uint8) & 0x07
+    lfo_speed = np.minimum(voices[:, 112], 99)
+    lfo_delay = np.minimum(voices[:, 113], 99)
+    pitch_mod_depth = np.minimum(voices[:, 114], 99)
+    amp_mod_depth = np.minimum(voices[:, 115], 99)
+    transpose = np.minimum(voices[:, 117], 48)
+
+    # Operator numbers 1..6 run the other way round in the voice data
+    carriers = ALG_CARRIERS[algorithm]                    # (N, 6) op1..op6
+    is_carrier = carriers[:, ::-1]                        # (N, 6) op6..op1
+    op_gain = _level_to_gain(out_level)                   # (N, 6) op6..op1
+
+    # --- 1. Global Scalars ---
+    globals_block = np.stack([
+        transpose - 24,
+        0.06 * (50.0 / 0.06) ** (lfo_speed / 99.0),
+        lfo_delay / 99.0 * 3.0,
+        pitch_mod_depth,
+        amp_mod_depth * 42.0 / 99.0,
+    ], axis=1)
+
+    # --- 2. Matrix: modulators scaled by their output level, feedback on its own path ---
+    mod_index = MAX_MOD_INDEX * op_gain[:, ::-1]          # (N, 6) op1..op6
+    fb_amount = np.where(feedback > 0, 2.0 ** (feedback.astype(float) - 5.0), 0.0)
+    matrix = (ALG_MOD_MASK[algorithm] * mod_index[:, None, :]
+              + ALG_FB_MASK[algorithm] * fb_amount[:, None, None])
+
+    # --- 4. PEG: 50 is "no pitch change" ---
+    peg = (peg_levels - 50.0) * 48.0 / 50.0
+
+    # --- 5. Operators ---
+    ratio = np.where(coarse == 0, 0.5, coarse) * (1.0 + fine / 100.0)
+    fixed = 10.0 ** ((coarse % 4) + fine / 100.0)
+    detune_cents = (detune - 7.0) * 20.0 / 7.0
+
+    # Envelope levels are gains; a carrier's output level is baked into its envelope
+    env_levels = _level_to_gain(levels) * np.where(is_carrier, op_gain, 1.0)[:, :, None]
+    # A stage starts from the previous level (stage 1 starts from L4); flat stages take no time
+    previous = np.roll(levels, 1, axis=2)
+    env_times = np.where(levels == previous, 0.0, EG_SLOWEST_TIME * 2.0 ** (-rates / 6.0))
+
+    op_block = np.empty((N, 6, SIZE_OP_PARAMS))
+    op_block[:, :, 0] = ratio
+    op_block[:, :, 1] = fixed
+    op_block[:, :, 2] = detune_cents
+    op_block[:, :, 3::2] = env_times
+    op_block[:, :, 4::2] = env_levels
+
+    values = np.empty((N, len(mins)))
+    values[:, OFFSET_GLOBALS:OFFSET_GLOBALS + SIZE_GLOBALS] = globals_block
+    values[:, OFFSET_MATRIX:OFFSET_MATRIX + SIZE_MATRIX] = matrix.reshape(N, SIZE_MATRIX)
+    values[:, OFFSET_MIXER:OFFSET_MIXER + SIZE_MIXER] = carriers
+    values[:, OFFSET_PEG:OFFSET_PEG + SIZE_PEG] = peg
+    values[:, OFFSET_OPS:] = op_block.reshape(N, 6 * SIZE_OP_PARAMS)
+
+    # The unused frequency of each operator sits at its minimum, like a null in the JSON
+    ratio_cols = OFFSET_OPS + np.arange(6) * SIZE_OP_PARAMS
+    fixed_cols = ratio_cols + 1
+    values[:, ratio_cols] = np.where(fixed_mode, mins[ratio_cols], values[:, ratio_cols])
+    values[:, fixed_cols] = np.where(fixed_mode, values[:, fixed_cols], mins[fixed_cols])
+
+    return np.clip(values, mins, maxs)
+
+def read_syx_banks(paths) -> np.ndarray:
+    """
+    Reads 32-voice bulk dumps from .syx files (or folders of them).
+    Malformed banks are skipped with a warning.
+    
+    Returns:
+        np.ndarray: (N, 128) uint8 packed voices from every valid bank.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(
+                os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith(".syx")
+            ))
+        else:
+            files.append(path)
+
+    banks = []
+    for file_path in files:
+        with open(file_path, 'rb') as f:
+            raw = np.frombuffer(f.read(), dtype=np.uint8)
+        if raw.size == 0 or raw.size % SYX_BANK_SIZE != 0:
+            print(f"[Warning] Skipping '{file_path}': not a 32-voice DX7 bank ({raw.size} bytes)")
+            continue
+        banks.append(raw.reshape(-1, SYX_BANK_SIZE))
+
+    if not banks:
+        return np.zeros((0, SYX_VOICE_SIZE), dtype=np.uint8)
+    banks = np.concatenate(banks)
+
+    # Header, footer and checksum checks for every bank at once
+    data = banks[:, SYX_DATA_OFFSET:SYX_DATA_OFFSET + SYX_VOICES_PER_BANK * SYX_VOICE_SIZE]
+    checksum = (-data.sum(axis=1, dtype=np.int64)) & 0x7F
+    valid = ((banks[:, 0] == 0xF0) & (banks[:, 1] == 0x43) & ((banks[:, 2] & 0xF0) == 0)
+             & (banks[:, 3] == 0x09) & (banks[:, 4] == 0x20) & (banks[:, 5] == 0x00)
+             & (banks[:, -1] == 0xF7) & (banks[:, -2] == checksum))
+    if not valid.all():
+        print(f"[Warning] Skipping {np.count_nonzero(~valid)} DX7 bank(s) with a bad header or checksum")
+
+    return data[valid].reshape(-1, SYX_VOICE_SIZE)
+
+def load_dx7_syx(paths):
+    """
+    Loads raw DX7 32-voice SysEx banks straight into the global state (state.py).
+    Voices are decoded with array slicing, so whole libraries convert in one pass.
+    
+    Args:
+        paths (str | list[str]): .syx files and/or folders containing them.
+    """
+    dims, mins, maxs = build_dx7_schema()
+
+    S.init_space(dims)
+    S.set_bounds(np.array(mins, dtype=float), np.array(maxs, dtype=float))
+
+    voices = read_syx_banks(paths)
+    values = decode_syx_voices(voices, S.mins, S.maxs)
+
+    raw_names = voices[:, 118:128].copy().view('S10').ravel()
+    names = [n.decode('ascii', 'replace').strip() or "Unknown" for n in raw_names]
+    colors = [get_color_from_name(name) for name in names]
 
-        S.add_preset(p_name, color=col_tuple, value=np.array([vector]))
+    S.add_presets(names, colors, values)
+
+def load_dx7_library(path):
+    """Loads a converted .json library or raw .syx banks, picked by the path."""
+    if str(path).lower().endswith(".json"):
+        load_dx7_json(path)
+    else:
+        load_dx7_syx(path)
 
 
 # =============================================================================
 # 3. OSC CLIENT LOGIC
 # =============================================================================
 
+def sc_parameter_layout():
+    """
+    The /update_synth argument groups in send order, as (label, flat-vector indices).
+    The vector stores operators Op6 -> Op1, SuperCollider wants Op1 -> Op6.
+    """
+    # Start of each operator's chunk, Op1 first
+    op_starts = OFFSET_OPS + (5 - np.arange(6)) * SIZE_OP_PARAMS
+    # Chunk layout follows OP_SCALAR_KEYS: [0:Ratio, 1:Fixed, 2:Detune], then Rate/Level pairs
+    # Envelope Indices: Rate=3,5,7,9 | Level=4,6,8,10
+    return [
+        ("opWiringMatrix", OFFSET_MATRIX + np.arange(SIZE_MATRIX)),
+        ("opOutMixer", OFFSET_MIXER + np.arange(SIZE_MIXER)),
+        ("opRatios", op_starts),
+        ("opEnvLevels", (op_starts[:, None] + np.array([4, 6, 8, 10])).ravel()),
+        ("opEnvTimes", (op_starts[:, None] + np.array([3, 5, 7, 9])).ravel()),
+    ]
+
+def _osc_string(text: str) -> bytes:
+    """OSC string: null terminated, padded to a multiple of 4 bytes."""
+    data = text.encode("ascii") + b"\0"
+    return data + b"\0" * (-len(data) % 4)
+
+class OSCFloatMessage:
+    """
+    An OSC message of string labels each followed by a run of float32 values, compiled once.
+    The address, type tags and labels are pre-encoded; encode() only gathers the values
+    from a vector and writes them big-endian into the same reusable buffer.
+    """
+    def __init__(self, address: str, groups):
+        type_tags = "," + "".join("s" + "f" * len(indices) for _, indices in groups)
+        packet = bytearray(_osc_string(address) + _osc_string(type_tags))
+
+        slots = []
+        for label, indices in groups:
+            packet += _osc_string(label)
+            # Everything in OSC is 4-byte aligned, so each float is one word of the packet
+            slots.append(len(packet) // 4 + np.arange(len(indices)))
+            packet += bytes(4 * len(indices))
+
+        self.buffer = packet
+        self._words = np.frombuffer(self.buffer, dtype=">f4")
+        self._slots = np.concatenate(slots)
+        self._gather = np.concatenate([indices for _, indices in groups]).astype(np.intp)
+        self._values = np.empty(len(self._gather))
+
+    def encode(self, vector: np.ndarray) -> bytearray:
+        """Write vector's values into the packet. Returns the (reused) packet buffer."""
+        np.take(np.asarray(vector, dtype=float), self._gather, out=self._values)
+        self._words[self._slots] = self._values
+        return self.buffer
+
 class DX7OSCClient:
     """
     Handles OSC communication with the SuperCollider synth engine.
     Formats high-dimensional vectors into the specific message structure expected by the synth.
+    
+    Sends are change-driven: parameters only go out when they moved by more than
+    `epsilon` and at most once every `min_interval` seconds; the gate only on edges.
     """
-    def __init__(self, ip="127.0.0.1", port=57120):
+    def __init__(self, ip="127.0.0.1", port=57120, epsilon=1e-6, min_interval=1.0 / 120.0):
         self.client = udp_client.SimpleUDPClient(ip, port)
-        
-    def send_active_preset(self, active_vector: np.ndarray):
+        # /update_synth goes out as pre-encoded bytes on a plain UDP socket
+        self._preset_message = OSCFloatMessage("/update_synth", sc_parameter_layout())
+        self._address = (ip, port)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+        self.epsilon = epsilon              # largest per-parameter change that is still "unchanged"
+        self.min_interval = min_interval    # seconds between /update_synth packets
+
+        self._last_vector = None            # last vector actually sent
+        self._last_send_time = -np.inf
+        self._pending = None                # newest vector held back by the rate limiter
+        self._last_gate = None
+
+        # Traffic counters
+        self.packets_sent = 0
+        self.packets_suppressed = 0  # parameter updates held back by epsilon or min_interval
+
+    def send_active_preset(self, active_vector: np.ndarray, force: bool = False) -> bool:
         """
-        Unpacks the vector using the CONSTANTS defined above.
-        Safe against schema changes as long as constants are updated.
+        Sends the vector if it differs from the last one sent. Returns True if a packet went out.
+        force: skip the change and rate checks.
         """
-        data = active_vector.flatten().tolist()
-        
-        # --- 1. Slice using Shared Offsets ---
-        # Note: Globals are indices 0 to OFFSET_MATRIX
-        # We don't necessarily send globals to SC unless needed (e.g. LFO)
-        
-        wiring_matrix = data[OFFSET_MATRIX : OFFSET_MATRIX + SIZE_MATRIX]
-        output_mixer  = data[OFFSET_MIXER  : OFFSET_MIXER + SIZE_MIXER]
-
-        # --- 3. Unpack Operators ---
-        op_ratios = []
-        op_detunes = []
-        op_env_times = []
-        op_env_levels = []
-        
-        # We iterate 6 times. The data is stored [Op6, Op5 ... Op1]
-        start_ptr = OFFSET_OPS
-        
-        for i in range(6):
-            chunk = data[start_ptr : start_ptr + SIZE_OP_PARAMS]
-            start_ptr += SIZE_OP_PARAMS
-            
-            # Map based on OP_SCALAR_KEYS order:
-            # [0:Ratio, 1:Fixed, 2:Detune] -> Envelopes start at index 3
-            
-            op_ratios.append(chunk[0]) 
-            op_detunes.append(chunk[2])
-            
-            # Envelope Extraction
-            # Indices: Rate=3,5,7,9 | Level=4,6,8,10
-            times = [chunk[3], chunk[5], chunk[7], chunk[9]]
-            levels = [chunk[4], chunk[6], chunk[8], chunk[10]]
-            
-            op_env_times.append(times)
-            op_env_levels.append(levels)
-
-        # --- 4. Reorder for SuperCollider ---
-        # Python: Op6 -> Op1
-        # SC:     Op1 -> Op6
-        op_ratios.reverse()
-        op_detunes.reverse()
-        op_env_times.reverse()
-        op_env_levels.reverse()
-        
-        # Flatten lists for OSC
-        flat_times = [t for op in op_env_times for t in op]
-        flat_levels = [l for op in op_env_levels for l in op]
-
-        # --- 5. Send ---
-        self.client.send_message("/update_synth", [
-            "opWiringMatrix", *wiring_matrix,
-            "opOutMixer", *output_mixer,
-            "opRatios", *op_ratios,
-            "opEnvLevels", *flat_levels,
-            "opEnvTimes", *flat_times
-        ])
-        
-    def send_gate(self, is_on: bool):
-        """Sends Note On (1) or Note Off (0)"""
+        vector = np.asarray(active_vector, dtype=float).ravel()
+
+        if not force:
+            last = self._last_vector
+            if last is not None and last.shape == vector.shape and np.max(np.abs(vector - last), initial=0.0) <= self.epsilon:
+                self._pending = None
+                self.packets_suppressed += 1
+                return False
+            if time.perf_counter() - self._last_send_time < self.min_interval:
+                # Too soon; whatever is newest by the next allowed send goes out then
+                self._pending = vector.copy()
+                self.packets_suppressed += 1
+                return False
+
+        self._send_preset(vector)
+        self._last_vector = vector.copy()
+        self._last_send_time = time.perf_counter()
+        self._pending = None
+        self.packets_sent += 1
+        return True
+
+    def _send_preset(self, active_vector: np.ndarray):
+        """Encodes the vector into the precompiled /update_synth packet and sends the raw bytes."""
+        self._sock.sendto(self._preset_message.encode(active_vector), self._address)
+
+    def send_gate(self, is_on: bool) -> bool:
+        """Sends Note On (1) or Note Off (0) when the gate changes. Returns True if a packet went out."""
+        is_on = bool(is_on)
+        if is_on == self._last_gate:
+            return False  # not a held-back update, so packets_suppressed doesn't count it
+
+        # Don't start a note on parameters the rate limiter is still holding back
+        if is_on and self._pending is not None:
+            self.send_active_preset(self._pending, force=True)
+
         val = 1.0 if is_on else 0.0
-        self.client.send_message("/gate", val)
\ No newline at end of file
+        self.client.send_message("/gate", val)
+        self._last_gate = is_on
+        self.packets_sent += 1
+        return True
+
+
+class OSCSenderThread:
+    """
+    Sends the synth state from a background thread at a fixed control rate.
+
+    The render loop only publish()es the newest vector and gate into a single-slot
+    mailbox; each tick the thread sends whatever is newest, so a slow frame never
+    blocks on the network or leaves a backlog of stale updates. The mailbox is one
+    tuple swapped by reference, so neither side ever waits on a lock.
+
+    With a morph.MorphEngine, the published vector is the target and what goes out
+    each tick is the engine's glide (or timed morph) toward it.
+    """
+    def __init__(self, client: DX7OSCClient, rate_hz: float = 200.0, engine=None):
+        self.client = client
+        self.interval = 1.0 / rate_hz
+        self.engine = engine
+        self._latest = (None, False)       # (read-only vector or None, gate); replaced by every publish
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="osc-sender", daemon=True)
+        self.errors = 0
+        profiler.register("osc_send (thread)")  # the column is taken here, not first on the sender thread
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def publish(self, vector: np.ndarray | None, gate: bool):
+        """
+        Replace the mailbox contents. Read-only vectors (e.g. state.snapshot.active)
+        are handed over as they are; writable ones are copied first.
+        """
+        if vector is not None and (vector.flags.writeable or vector.dtype != float):
+            vector = np.array(vector, dtype=float)
+            vector.setflags(write=False)
+        self._latest = (vector, bool(gate))
+
+    def stop(self):
+        """Stop the thread and release the note."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        try:
+            self.client.send_gate(False)
+        except OSError:
+            pass
+
+    def _run(self):
+        next_tick = last_tick = time.perf_counter()
+        while not self._stop.is_set():
+            vector, gate = self._latest
+            try:
+                with profiler.stage("osc_send (thread)"):
+                    if self.engine is not None:
+                        tick = time.perf_counter()
+                        vector = self.engine.step(vector, tick - last_tick)
+                        last_tick = tick
+                    if vector is not None:
+                        self.client.send_active_preset(vector)
+                        self.client.send_gate(gate)
+                    else:
+                        self.client.send_gate(False)
+            except OSError as e:
+                # Full socket buffer or unreachable host: drop this tick, the next one resends
+                if self.errors == 0:
+                    print(f"[Warning] OSC send failed: {e}")
+                self.errors += 1
+
+            # Fixed rate without drift; after a stall skip the missed ticks instead of bursting
+            next_tick += self.interval
+            now = time.perf_counter()
+            if next_tick < now:
+                next_tick = now
+            self._stop.wait(next_tick - now)
@@ -0,0 +1,195 @@
+"""
+Nonlinear 2D layout of the preset library (landmark MDS refined with SMACOF).
+
+The work runs in a one-process pool so the render loop never waits on it:
+- the pool initializer gets the unit-space presets once, picks landmarks, computes
+  their pairwise distances and, for every preset, its nearest landmarks;
+- each task runs a chunk of SMACOF stress-majorization iterations on the landmarks
+  and places every preset by inverse-distance weighting of its landmarks, so the
+  UI can show the layout improving while it converges.
+Workers are spawned on every platform, never forked from the UI process and its
+threads. They only run this module's functions, but spawning re-imports the app's
+main module, so that must stay safe to import (startup under __name__ == "__main__").
+Finished layouts are cached on disk, keyed by a hash of the library; the app keeps
+them in the .cache folder next to the library, beside its parse cache.
+"""
+
+import os
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+CACHE_DIR = ".cache"
+MAX_LANDMARKS = 1000
+PLACE_NEIGHBOURS = 8      # landmarks that place each preset
+CHUNK_ITERATIONS = 10     # SMACOF iterations per pool task
+MAX_ITERATIONS = 300
+STRESS_TOLERANCE = 1e-5   # stop once an iteration chunk improves stress by less than this
+
+
+# ---------- worker side ----------
+_worker: dict = {}
+
+def _pairwise(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Euclidean distances between the rows of a and b."""
+    d2 = (a ** 2).sum(axis=1)[:, None] - 2.0 * (a @ b.T) + (b ** 2).sum(axis=1)
+    return np.sqrt(np.maximum(d2, 0.0))
+
+def _init_worker(unit: np.ndarray, seed: int):
+    """Pool initializer: landmarks, their distances and every preset's nearest landmarks."""
+    rng = np.random.default_rng(seed)
+    V = unit.shape[0]
+    landmarks = np.sort(rng.choice(V, min(V, MAX_LANDMARKS), replace=False))
+    targets = _pairwise(unit[landmarks], unit[landmarks])
+
+    k = min(PLACE_NEIGHBOURS, len(landmarks))
+    neighbours = np.empty((V, k), dtype=np.intp)
+    weights = np.empty((V, k))
+    for start in range(0, V, 4096):  # chunked so V x landmarks never sits in memory at once
+        d = _pairwise(unit[start:start + 4096], unit[landmarks])
+        nearest = np.argpartition(d, k - 1, axis=1)[:, :k]
+        nd = np.take_along_axis(d, nearest, axis=1)
+        w = 1.0 / np.maximum(nd, 1e-9) ** 2
+        neighbours[start:start + 4096] = nearest
+        weights[start:start + 4096] = w / w.sum(axis=1, keepdims=True)
+
+    _worker.update(targets=targets, neighbours=neighbours, weights=weights)
+
+def _classical_mds(targets: np.ndarray) -> np.ndarray:
+    """Torgerson MDS: top-2 eigenvectors of the double-centred squared distances."""
+    n = targets.shape[0]
+    J = np.eye(n) - 1.0 / n
+    B = -0.5 * J @ (targets ** 2) @ J
+    eigvals, eigvecs = np.linalg.eigh(B)
+    top = np.argsort(eigvals)[::-1][:2]
+    coords = eigvecs[:, top] * np.sqrt(np.maximum(eigvals[top], 0.0))
+    if coords.shape[1] < 2:
+        coords = np.hstack([coords, np.zeros((n, 2 - coords.shape[1]))])
+    return coords
+
+def _refine(coords: np.ndarray | None, iterations: int) -> tuple[np.ndarray, np.ndarray, float]:
+    """
+    One progress step: SMACOF iterations on the landmarks (starting from classical MDS
+    when coords is None), then place every preset. Returns (landmark coords, all coords, stress).
+    """
+    targets = _worker["targets"]
+    n = targets.shape[0]
+    if coords is None:
+        coords = _classical_mds(targets)
+
+    for _ in range(iterations):
+        # Guttman transform: X <- B(X) X / n
+        d = _pairwise(coords, coords)
+        ratio = np.divide(targets, d, out=np.zeros_like(d), where=d > 1e-12)
+        B = -ratio
+        B[np.diag_indices(n)] = ratio.sum(axis=1) - np.diag(ratio)
+        coords = B @ coords / n
+
+    d = _pairwise(coords, coords)
+    stress = float(np.sqrt(((d - targets) ** 2).sum() / max((targets ** 2).sum(), 1e-12)))
+    placed = np.einsum("vk,vkc->vc", _worker["weights"], coords[_worker["neighbours"]])
+    return coords, placed, stress
+
+
+# ---------- main-process side ----------
+def library_hash(presets: np.ndarray, mins: np.ndarray, maxs: np.ndarray) -> str:
+    h = hashlib.sha256()
+    for array in (presets, mins, maxs):
+        array = np.ascontiguousarray(array, dtype=float)
+        h.update(str(array.shape).encode())
+        h.update(array.tobytes())
+    return h.hexdigest()
+
+def get_cache_path(lib_hash: str, cache_dir: str = CACHE_DIR) -> str:
+    return os.path.join(cache_dir, f"embedding-{lib_hash[:32]}.npy")
+
+def normalize_layout(coords: np.ndarray) -> np.ndarray:
+    """Fit coords into the 0..1 pad square with a margin, keeping the aspect ratio."""
+    lo = coords.min(axis=0)
+    span = max(float((coords.max(axis=0) - lo).max()), 1e-12)
+    return 0.05 + 0.9 * (coords - lo) / span
+
+def lift(u: float, v: float, layout: np.ndarray, presets: np.ndarray, k: int = PLACE_NEIGHBOURS) -> np.ndarray:
+    """A D-dimensional preset for a point of the layout: inverse-distance average of the k closest presets there."""
+    d = np.sqrt(((layout - (u, v)) ** 2).sum(axis=1))
+    k = min(k, len(d))
+    nearest = np.argpartition(d, k - 1)[:k]
+    if d[nearest].min() < 1e-9:
+        return presets[nearest[np.argmin(d[nearest])]].copy()
+    w = 1.0 / d[nearest] ** 2
+    return (w / w.sum()) @ presets[nearest]
+
+
+class EmbeddingJob:
+    """
+    Computes (or loads from cache) the layout for one library snapshot.
+    Call poll() once per frame: it collects finished chunks, queues the next
+    and returns the newest layout (V,2) in pad units, or None before the first one.
+    """
+    def __init__(self, unit: np.ndarray, lib_hash: str, seed: int = 0, cache_dir: str = CACHE_DIR):
+        self.cache_path = get_cache_path(lib_hash, cache_dir)
+        self.iterations = 0
+        self.stress = None
+        self.done = False
+        self.layout = None
+        self.version = 0          # bumped every time layout changes
+        self._landmarks = None
+        self._future = None
+        self._executor = None
+
+        try:
+            cached = np.load(self.cache_path, allow_pickle=False)
+            if cached.shape == (unit.shape[0], 2):
+                self._set_layout(cached)
+                self.done = True
+                return
+        except (OSError, ValueError):
+            pass
+
+        self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_init_worker, initargs=(unit, seed))
+        self._future = self._executor.submit(_refine, None, CHUNK_ITERATIONS)
+
+    def _set_layout(self, coords):
+        self.layout = normalize_layout(coords)
+        self.version += 1
+
+    def poll(self) -> np.ndarray | None:
+        future = self._future
+        if future is not None and future.done():
+            self._future = None
+            try:
+                landmarks, placed, stress = future.result()
+            except Exception as e:
+                print(f"[Warning] Layout computation failed: {e}")
+                self.cancel()
+                return self.layout
+
+            improvement = np.inf if self.stress is None else self.stress - stress
+            self._landmarks, self.stress = landmarks, stress
+            self.iterations += CHUNK_ITERATIONS
+            self._set_layout(placed)
+
+            if self.iterations >= MAX_ITERATIONS or improvement < STRESS_TOLERANCE:
+                self.done = True
+                self._save()
+                self.cancel()
+            else:
+                self._future = self._executor.submit(_refine, landmarks, CHUNK_ITERATIONS)
+        return self.layout
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            np.save(self.cache_path, self.layout)
+        except OSError as e:
+            print(f"[Warning] Could not write layout cache {self.cache_path}: {e}")
+
+    def cancel(self):
+        """Stop the worker process. The last layout stays available."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._future = None
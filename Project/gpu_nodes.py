@@ -0,0 +1,272 @@
+"""
+Instanced OpenGL renderer for the preset nodes on the pad.
+
+Every node layer (selection ring, colored body, on-plane dot) is one instance of a
+screen-space quad shaded into an anti-aliased disc. The instance arrays are built
+with NumPy from the cached projection and submitted in a single draw call, scissored
+to the pad.
+
+The batch is drawn before imgui renders, so everything imgui draws in the pad
+(markers, rings, dragged nodes, overlays, tooltips) lands on top of it. The pad
+window is see-through in that mode, and what used to sit under the nodes (the pad
+background, the slice polygon fill, the grid dots) is painted here first.
+"""
+
+import ctypes
+
+import numpy as np
+import OpenGL.GL as gl
+
+# One instance: center + radius in screen pixels, RGBA color
+INSTANCE_DTYPE = np.dtype([("node", np.float32, 3), ("color", np.uint8, 4)])
+
+NODE_RADIUS = 8.0
+HOVER_GROW = 2.0       # extra radius on hover
+RING_GROW = 3.0        # selection ring extends this far past the body
+DOT_RADIUS = 2.0       # on-plane marker
+MIN_LOD_SCALE = 0.35   # nodes shrink with zoom-out down to this fraction
+MIN_PIXEL_RADIUS = 1.5 # smaller nodes are drawn at this size but fade out instead
+
+VERTEX_SHADER = """
+#version 330 core
+layout(location = 0) in vec2 a_corner;
+layout(location = 1) in vec3 a_node;    // x, y, radius in screen pixels
+layout(location = 2) in vec4 a_color;
+uniform vec2 u_display_size;
+out vec2 v_local;
+out float v_radius;
+out vec4 v_color;
+void main() {
+    float extent = a_node.z + 1.0;      // one pixel of margin for the anti-aliased edge
+    v_local = a_corner * extent;
+    v_radius = a_node.z;
+    v_color = a_color;
+    vec2 p = a_node.xy + v_local;
+    gl_Position = vec4(p.x / u_display_size.x * 2.0 - 1.0, 1.0 - p.y / u_display_size.y * 2.0, 0.0, 1.0);
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 330 core
+in vec2 v_local;
+in float v_radius;
+in vec4 v_color;
+out vec4 frag_color;
+void main() {
+    float coverage = clamp(v_radius - length(v_local) + 0.5, 0.0, 1.0);
+    if (coverage <= 0.0) discard;
+    frag_color = vec4(v_color.rgb, v_color.a * coverage);
+}
+"""
+
+# Solid convex polygons (the pad background, the slice region fill)
+FILL_VERTEX_SHADER = """
+#version 330 core
+layout(location = 0) in vec2 a_pos;     // screen pixels
+uniform vec2 u_display_size;
+void main() {
+    gl_Position = vec4(a_pos.x / u_display_size.x * 2.0 - 1.0, 1.0 - a_pos.y / u_display_size.y * 2.0, 0.0, 1.0);
+}
+"""
+
+FILL_FRAGMENT_SHADER = """
+#version 330 core
+uniform vec4 u_color;
+out vec4 frag_color;
+void main() {
+    frag_color = u_color;
+}
+"""
+
+
+def rounded_rect(rect, rounding: float, segments: int = 8) -> np.ndarray:
+    """(k, 2) convex outline of rect = (x1, y1, x2, y2) with rounded corners, for NodeRenderer.fill()."""
+    x1, y1, x2, y2 = rect
+    r = min(rounding, (x2 - x1) / 2, (y2 - y1) / 2)
+    corners = ((x2 - r, y2 - r), (x1 + r, y2 - r), (x1 + r, y1 + r), (x2 - r, y1 + r))
+    arcs = []
+    for quarter, (cx, cy) in enumerate(corners):
+        angles = (quarter + np.linspace(0.0, 1.0, segments + 1)) * (np.pi / 2)
+        arcs.append(np.stack([cx + r * np.cos(angles), cy + r * np.sin(angles)], axis=1))
+    return np.concatenate(arcs)
+
+def disc_instances(xs, ys, radius: float, rgba) -> np.ndarray:
+    """Instance array of same-sized, same-colored discs (e.g. the grid dots)."""
+    instances = np.empty(len(xs), dtype=INSTANCE_DTYPE)
+    instances["node"][:, 0] = xs
+    instances["node"][:, 1] = ys
+    instances["node"][:, 2] = radius
+    instances["color"] = rgba
+    return instances
+
+def build_node_instances(xs, ys, dists, colors, selected, hovered_idx, clip_rect, zoom) -> np.ndarray:
+    """
+    Instance array for all visible nodes, in the same back-to-front order as the imgui path:
+    per node its selection ring, body and on-plane dot.
+    xs, ys: (V,) screen positions; dists: (V,) distance to the plane; colors: (V,3) uint8;
+    selected: (V,) bool; clip_rect: (x1, y1, x2, y2) of the pad; zoom: S.pad_zoom.
+    """
+    count = len(xs)
+    radius = np.full(count, NODE_RADIUS)
+    if hovered_idx is not None:
+        radius[hovered_idx] += HOVER_GROW
+
+    # Plane-distance scaling: far nodes shrink (same curve as the imgui path)
+    closeness = np.round(np.clip(1.0 - dists, 0.0, None) ** 5, 5)
+
+    # Level of detail: shrink nodes when zoomed out
+    lod = min(1.0, max(MIN_LOD_SCALE, zoom))
+
+    # Layers: 0 = selection ring, 1 = body, 2 = on-plane dot
+    radii = np.empty((count, 3))
+    radii[:, 0] = np.where(selected, (radius + RING_GROW) * closeness, 0.0)
+    radii[:, 1] = radius * closeness
+    radii[:, 2] = np.where(dists < 1e-5, DOT_RADIUS * closeness, 0.0)
+    radii *= lod
+
+    rgba = np.full((count, 3, 4), 255, dtype=np.uint8)
+    rgba[:, 1, :3] = colors[:, :3]
+
+    # Viewport culling on the outermost layer of each node
+    x1, y1, x2, y2 = clip_rect
+    outer = radii.max(axis=1)
+    visible = (xs + outer >= x1) & (xs - outer <= x2) & (ys + outer >= y1) & (ys - outer <= y2) & (outer > 0)
+
+    keep = visible[:, None] & (radii > 0)
+    node_ids, layers = np.nonzero(keep)  # row-major: per node ring, body, dot
+    layer_radii = radii[node_ids, layers]
+
+    instances = np.empty(node_ids.size, dtype=INSTANCE_DTYPE)
+    instances["node"][:, 0] = xs[node_ids]
+    instances["node"][:, 1] = ys[node_ids]
+    instances["node"][:, 2] = np.maximum(layer_radii, MIN_PIXEL_RADIUS)
+    instances["color"] = rgba[node_ids, layers]
+    # Sub-pixel nodes keep a minimum size and fade with their true size instead
+    fade = np.clip(layer_radii / MIN_PIXEL_RADIUS, 0.0, 1.0)
+    instances["color"][:, 3] = (instances["color"][:, 3] * fade).astype(np.uint8)
+    return instances
+
+
+def _compile(source, kind):
+    shader = gl.glCreateShader(kind)
+    gl.glShaderSource(shader, source)
+    gl.glCompileShader(shader)
+    if not gl.glGetShaderiv(shader, gl.GL_COMPILE_STATUS):
+        raise RuntimeError(gl.glGetShaderInfoLog(shader).decode(errors="replace"))
+    return shader
+
+def _link(vertex_source, fragment_source):
+    vs = _compile(vertex_source, gl.GL_VERTEX_SHADER)
+    fs = _compile(fragment_source, gl.GL_FRAGMENT_SHADER)
+    program = gl.glCreateProgram()
+    gl.glAttachShader(program, vs)
+    gl.glAttachShader(program, fs)
+    gl.glLinkProgram(program)
+    if not gl.glGetProgramiv(program, gl.GL_LINK_STATUS):
+        raise RuntimeError(gl.glGetProgramInfoLog(program).decode(errors="replace"))
+    gl.glDeleteShader(vs)
+    gl.glDeleteShader(fs)
+    return program
+
+
+class NodeRenderer:
+    """
+    Owns the shaders, the quad and the instance buffer. Needs a current GL 3.3 context.
+    fill() and queue() the frame's backdrop and instances while building the UI, in
+    back-to-front order, then render() them before imgui.
+    """
+    def __init__(self):
+        self.program = _link(VERTEX_SHADER, FRAGMENT_SHADER)
+        self._u_display_size = gl.glGetUniformLocation(self.program, "u_display_size")
+        self.fill_program = _link(FILL_VERTEX_SHADER, FILL_FRAGMENT_SHADER)
+        self._u_fill_display_size = gl.glGetUniformLocation(self.fill_program, "u_display_size")
+        self._u_fill_color = gl.glGetUniformLocation(self.fill_program, "u_color")
+
+        self.vao = gl.glGenVertexArrays(1)
+        gl.glBindVertexArray(self.vao)
+
+        # Shared quad, drawn as a triangle strip
+        corners = np.array([[-1, -1], [1, -1], [-1, 1], [1, 1]], dtype=np.float32)
+        self.quad_vbo = gl.glGenBuffers(1)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.quad_vbo)
+        gl.glBufferData(gl.GL_ARRAY_BUFFER, corners.nbytes, corners, gl.GL_STATIC_DRAW)
+        gl.glEnableVertexAttribArray(0)
+        gl.glVertexAttribPointer(0, 2, gl.GL_FLOAT, gl.GL_FALSE, 0, ctypes.c_void_p(0))
+
+        # Per-instance attributes, refilled every frame
+        stride = INSTANCE_DTYPE.itemsize
+        self.instance_vbo = gl.glGenBuffers(1)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.instance_vbo)
+        gl.glEnableVertexAttribArray(1)
+        gl.glVertexAttribPointer(1, 3, gl.GL_FLOAT, gl.GL_FALSE, stride, ctypes.c_void_p(INSTANCE_DTYPE.fields["node"][1]))
+        gl.glVertexAttribDivisor(1, 1)
+        gl.glEnableVertexAttribArray(2)
+        gl.glVertexAttribPointer(2, 4, gl.GL_UNSIGNED_BYTE, gl.GL_TRUE, stride, ctypes.c_void_p(INSTANCE_DTYPE.fields["color"][1]))
+        gl.glVertexAttribDivisor(2, 1)
+
+        # Polygon vertices for fill(), refilled per polygon
+        self.fill_vao = gl.glGenVertexArrays(1)
+        gl.glBindVertexArray(self.fill_vao)
+        self.fill_vbo = gl.glGenBuffers(1)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.fill_vbo)
+        gl.glEnableVertexAttribArray(0)
+        gl.glVertexAttribPointer(0, 2, gl.GL_FLOAT, gl.GL_FALSE, 0, ctypes.c_void_p(0))
+
+        gl.glBindVertexArray(0)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
+
+        self._fills = []
+        self._batches = []
+        self._clip_rect = None
+
+    def fill(self, polygon, rgba, clip_rect):
+        """Paint a convex polygon ((k, 2) screen coordinates, RGBA 0-255) under everything queued this frame."""
+        self._fills.append((np.asarray(polygon, dtype=np.float32), np.asarray(rgba, dtype=np.float32) / 255.0))
+        self._clip_rect = clip_rect
+
+    def queue(self, instances: np.ndarray, clip_rect):
+        """Add instances to draw this frame, over those queued before. clip_rect is (x1, y1, x2, y2) in imgui screen coordinates."""
+        self._batches.append(instances)
+        self._clip_rect = clip_rect
+
+    def render(self, display_size, framebuffer_scale):
+        """Draw and clear what was queued. Call before the imgui renderer, so imgui draws on top."""
+        fills, self._fills = self._fills, []
+        batches, self._batches = self._batches, []
+        instances = np.concatenate(batches) if batches else np.empty(0, dtype=INSTANCE_DTYPE)
+        if not fills and instances.size == 0:
+            return
+
+        width, height = display_size
+        scale_x, scale_y = framebuffer_scale
+        x1, y1, x2, y2 = self._clip_rect
+
+        gl.glViewport(0, 0, int(width * scale_x), int(height * scale_y))
+        gl.glEnable(gl.GL_BLEND)
+        gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
+        gl.glEnable(gl.GL_SCISSOR_TEST)
+        # GL scissor is in framebuffer pixels from the bottom-left
+        gl.glScissor(int(x1 * scale_x), int((height - y2) * scale_y), int((x2 - x1) * scale_x), int((y2 - y1) * scale_y))
+
+        if fills:
+            gl.glUseProgram(self.fill_program)
+            gl.glUniform2f(self._u_fill_display_size, width, height)
+            gl.glBindVertexArray(self.fill_vao)
+            gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.fill_vbo)
+            for polygon, color in fills:
+                gl.glUniform4f(self._u_fill_color, *color)
+                gl.glBufferData(gl.GL_ARRAY_BUFFER, polygon.nbytes, polygon, gl.GL_STREAM_DRAW)
+                gl.glDrawArrays(gl.GL_TRIANGLE_FAN, 0, len(polygon))
+
+        if instances.size:
+            gl.glUseProgram(self.program)
+            gl.glUniform2f(self._u_display_size, width, height)
+            gl.glBindVertexArray(self.vao)
+            gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.instance_vbo)
+            gl.glBufferData(gl.GL_ARRAY_BUFFER, instances.nbytes, instances, gl.GL_STREAM_DRAW)
+            gl.glDrawArraysInstanced(gl.GL_TRIANGLE_STRIP, 0, 4, instances.size)
+
+        gl.glBindVertexArray(0)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
+        gl.glUseProgram(0)
+        gl.glDisable(gl.GL_SCISSOR_TEST)
@@ -0,0 +1,84 @@
+"""
+Density heatmap of projected presets, for libraries too large to read as individual nodes.
+
+Screen positions are binned into a coarse 2D histogram (weighted by closeness to the
+plane, with the same emphasis curve as the node radius), color mapped and uploaded as a GL texture that the pad draws with add_image.
+"""
+
+import numpy as np
+import OpenGL.GL as gl
+
+# Color ramp from sparse to dense, alpha included (0-255)
+RAMP_STOPS = np.array([0.0, 0.35, 1.0])
+RAMP_COLORS = np.array([
+    (92, 242, 214, 0),     # aqua, transparent
+    (100, 181, 246, 150),  # blue
+    (176, 240, 71, 235),   # lime
+], dtype=float)
+
+
+def _make_lut(size=256):
+    """(size, 4) uint8 lookup table along the ramp."""
+    t = np.linspace(0.0, 1.0, size)
+    return np.stack([np.interp(t, RAMP_STOPS, RAMP_COLORS[:, c]) for c in range(4)], axis=1).astype(np.uint8)
+
+LUT = _make_lut()
+
+
+def bin_density(xs, ys, weights, rect, bin_px) -> np.ndarray:
+    """
+    Weighted 2D histogram of screen points over rect = (x1, y1, x2, y2).
+    Returns (rows, cols) float, row 0 at the top. Points outside rect are dropped.
+    """
+    x1, y1, x2, y2 = rect
+    cols = max(1, int(np.ceil((x2 - x1) / bin_px)))
+    rows = max(1, int(np.ceil((y2 - y1) / bin_px)))
+
+    cx = np.floor((xs - x1) / bin_px)
+    cy = np.floor((ys - y1) / bin_px)
+    inside = (cx >= 0) & (cx < cols) & (cy >= 0) & (cy < rows)
+    flat = cy[inside].astype(np.intp) * cols + cx[inside].astype(np.intp)
+    counts = np.bincount(flat, weights=weights[inside], minlength=rows * cols)
+    return counts.reshape(rows, cols)
+
+def colorize(density: np.ndarray) -> np.ndarray:
+    """Log-scaled density -> (rows, cols, 4) RGBA uint8 through LUT."""
+    level = np.log1p(density)
+    peak = level.max()
+    if peak > 0:
+        level /= peak
+    return LUT[(level * (len(LUT) - 1)).astype(np.intp)]
+
+
+class DensityHeatmap:
+    """
+    Owns the heatmap texture. update() rebins only when its key (view + projection) changes.
+    Needs a current GL context.
+    """
+    def __init__(self, bin_px: int = 4):
+        self.bin_px = bin_px
+        self.texture = None
+        self._key = None
+
+    def update(self, key, xs, ys, dists, rect) -> bool:
+        """Rebin and re-upload if key differs from the last update. Returns True if it did."""
+        if key == self._key and self.texture is not None:
+            return False
+
+        closeness = np.clip(1.0 - dists, 0.0, None) ** 5
+        rgba = np.ascontiguousarray(colorize(bin_density(xs, ys, closeness, rect, self.bin_px)))
+        rows, cols = rgba.shape[:2]
+
+        if self.texture is None:
+            self.texture = gl.glGenTextures(1)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self.texture)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_LINEAR)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S, gl.GL_CLAMP_TO_EDGE)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_T, gl.GL_CLAMP_TO_EDGE)
+        gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, 1)
+        gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGBA, cols, rows, 0, gl.GL_RGBA, gl.GL_UNSIGNED_BYTE, rgba)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
+
+        self._key = key
+        return True
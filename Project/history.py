@@ -0,0 +1,156 @@
+"""
+Undo/redo journal for edits to the preset matrix.
+
+Entries store only the changed block: the edited rows, the columns that actually
+changed, and their values before and after. Edits made inside one group (a mouse
+gesture, a scripted bulk edit) collapse into a single entry, and the undo stack is
+a ring that drops its oldest entries once it exceeds a byte budget.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class Edit:
+    """One undoable change: values[rows][:, cols] went from before to after."""
+    rows: np.ndarray    # (k,) row indices
+    cols: np.ndarray    # (m,) column indices
+    before: np.ndarray  # (k, m)
+    after: np.ndarray   # (k, m)
+
+    @property
+    def nbytes(self) -> int:
+        return self.rows.nbytes + self.cols.nbytes + self.before.nbytes + self.after.nbytes
+
+
+class Journal:
+    """
+    get_matrix: returns the live (V, D) matrix the edits apply to.
+    Writers call touch(rows) before changing those rows, inside a group().
+    """
+    def __init__(self, get_matrix, budget_bytes: int = 64 * 1024 * 1024):
+        self.get_matrix = get_matrix
+        self.budget_bytes = budget_bytes
+        self._undo: deque[Edit] = deque()
+        self._redo: list[Edit] = []
+        self._undo_bytes = 0
+        self._depth = 0
+        self._before: dict[int, np.ndarray] = {}  # row -> its values when the open group first touched it
+
+    # ---------- recording ----------
+    def begin_group(self):
+        self._depth += 1
+
+    def end_group(self):
+        """Close a group; the outermost close turns everything touched into one entry."""
+        if self._depth == 0:
+            return
+        self._depth -= 1
+        if self._depth == 0:
+            self._commit()
+
+    def group(self):
+        """Context manager form of begin_group/end_group."""
+        return _Group(self)
+
+    def touch(self, rows):
+        """Remember the current values of rows (first touch per group wins)."""
+        matrix = self.get_matrix()
+        for row in np.atleast_1d(rows).tolist():
+            if row not in self._before:
+                self._before[row] = matrix[row].copy()
+
+    def _commit(self):
+        if not self._before:
+            return
+        rows = np.fromiter(self._before.keys(), dtype=np.intp, count=len(self._before))
+        before = np.stack(list(self._before.values()))
+        self._before = {}
+
+        matrix = self.get_matrix()
+        if before.shape[1] != matrix.shape[1] or rows.max() >= matrix.shape[0]:
+            return  # the matrix was reshaped mid-group; nothing sensible to record
+        after = matrix[rows]
+
+        # Keep only the rows and columns that really changed
+        changed = before != after
+        keep_rows = changed.any(axis=1)
+        cols = np.flatnonzero(changed.any(axis=0))
+        if cols.size == 0:
+            return
+        block = np.ix_(keep_rows, cols)
+        self._push_undo(Edit(rows[keep_rows], cols, before[block], after[block]))
+        self._redo.clear()
+
+    def _push_undo(self, edit: Edit):
+        self._undo.append(edit)
+        self._undo_bytes += edit.nbytes
+        while self._undo_bytes > self.budget_bytes and len(self._undo) > 1:
+            self._undo_bytes -= self._undo.popleft().nbytes
+
+    # ---------- replay ----------
+    def undo(self) -> np.ndarray | None:
+        """Revert the newest entry. Returns the rows it changed, or None if there was nothing to undo."""
+        self.end_all()
+        if not self._undo:
+            return None
+        edit = self._undo.pop()
+        self._undo_bytes -= edit.nbytes
+        self.get_matrix()[np.ix_(edit.rows, edit.cols)] = edit.before
+        self._redo.append(edit)
+        return edit.rows
+
+    def redo(self) -> np.ndarray | None:
+        """Re-apply the newest undone entry. Returns the rows it changed, or None."""
+        self.end_all()
+        if not self._redo:
+            return None
+        edit = self._redo.pop()
+        self.get_matrix()[np.ix_(edit.rows, edit.cols)] = edit.after
+        self._push_undo(edit)
+        return edit.rows
+
+    def end_all(self):
+        """Close any open groups (e.g. undo pressed mid-gesture)."""
+        if self._depth:
+            self._depth = 0
+            self._commit()
+
+    def clear(self):
+        """Forget everything, e.g. when the matrix changes shape."""
+        self._undo.clear()
+        self._redo.clear()
+        self._undo_bytes = 0
+        self._depth = 0
+        self._before = {}
+
+    @property
+    def recording(self) -> bool:
+        """True while a group is open (e.g. mid-gesture)."""
+        return self._depth > 0
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+
+class _Group:
+    __slots__ = ("journal",)
+
+    def __init__(self, journal):
+        self.journal = journal
+
+    def __enter__(self):
+        self.journal.begin_group()
+        return self.journal
+
+    def __exit__(self, *exc):
+        self.journal.end_group()
+        return False
@@ -0,0 +1,140 @@
+"""
+k-nearest-neighbour search over preset vectors (unit space, Euclidean).
+"""
+
+import numpy as np
+
+
+def _nearest_center(points, sqnorms, centers) -> np.ndarray:
+    """Index of the closest center for every point, through one matrix product."""
+    d2 = sqnorms[:, None] - 2.0 * (points @ centers.T) + (centers ** 2).sum(axis=1)
+    return np.argmin(d2, axis=1)
+
+
+class BallIndex:
+    """
+    Exact nearest-neighbour index: points partitioned into balls plus an overflow buffer.
+
+    The balls come from a few k-means rounds, so they follow the clusters of the
+    library (which a median split in ~100 dimensions does not). Every ball is a
+    contiguous block; a query ranks the balls by the closest any of their points
+    could be and scans them in that order until no ball can beat the k-th distance.
+    insert() puts new or edited points in the overflow buffer (scanned brute force)
+    and tombstones their old copy, so edits never restructure the index; rebuild
+    once needs_rebuild says the overflow got too large.
+    """
+    def __init__(self, points: np.ndarray, n_balls: int | None = None, iterations: int = 6, seed: int = 0):
+        points = np.asarray(points, dtype=float)
+        n, D = points.shape
+        self.D = D
+        self.size = n
+
+        if n_balls is None:
+            n_balls = int(np.clip(np.sqrt(n), 1, 1024))
+        n_balls = max(1, min(n_balls, n))
+
+        sqnorms = (points ** 2).sum(axis=1)
+        labels = np.zeros(n, dtype=np.intp)
+        if n:
+            # Fit the centers on a sample, then assign every point once
+            rng = np.random.default_rng(seed)
+            sample = points[rng.choice(n, min(n, 32 * n_balls), replace=False)]
+            centers = sample[:n_balls].copy()
+            for _ in range(iterations):
+                sample_labels = _nearest_center(sample, (sample ** 2).sum(axis=1), centers)
+                # Move every center to the mean of its points (per-ball sums over the label-sorted rows)
+                order = np.argsort(sample_labels, kind="stable")
+                filled, starts, counts = np.unique(sample_labels[order], return_index=True, return_counts=True)
+                centers[filled] = np.add.reduceat(sample[order], starts, axis=0) / counts[:, None]
+            labels = _nearest_center(points, sqnorms, centers)
+
+        # Reorder so every ball is a contiguous block
+        order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=n_balls)
+        self._ends = np.cumsum(counts)
+        self._starts = self._ends - counts
+        self._ids = order
+        self._points = points[order]
+        self._sqnorms = sqnorms[order]
+
+        self._centers = np.zeros((n_balls, D))
+        self._radii = np.zeros(n_balls)
+        for b in np.flatnonzero(counts):
+            block = self._points[self._starts[b]:self._ends[b]]
+            self._centers[b] = block.mean(axis=0)
+            self._radii[b] = np.sqrt(((block - self._centers[b]) ** 2).sum(axis=1).max())
+
+        self._tree_pos = np.empty(n, dtype=np.intp)
+        self._tree_pos[order] = np.arange(n)
+
+        # Overflow: points added or edited since the build
+        self._extra_points = np.empty((16, D))
+        self._extra_ids = np.empty(16, dtype=np.intp)
+        self._extra_slot: dict[int, int] = {}
+
+    @property
+    def overflow(self) -> int:
+        return len(self._extra_slot)
+
+    @property
+    def needs_rebuild(self) -> bool:
+        return self.overflow > max(1024, self.size // 20)
+
+    def insert(self, ids, points):
+        """Add points, or replace the stored value of ids already in the index."""
+        ids = np.atleast_1d(ids)
+        points = np.asarray(points, dtype=float).reshape(len(ids), self.D)
+        for i, point in zip(ids.tolist(), points):
+            if i < self.size and self._sqnorms[self._tree_pos[i]] != np.inf:
+                # Tombstone the copy in its ball
+                self._sqnorms[self._tree_pos[i]] = np.inf
+            slot = self._extra_slot.get(i)
+            if slot is None:
+                slot = len(self._extra_slot)
+                if slot == self._extra_ids.shape[0]:
+                    self._extra_points = np.concatenate([self._extra_points, np.empty_like(self._extra_points)])
+                    self._extra_ids = np.concatenate([self._extra_ids, np.empty_like(self._extra_ids)])
+                self._extra_slot[i] = slot
+                self._extra_ids[slot] = i
+            self._extra_points[slot] = point
+
+    def query(self, q: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Ids and distances of the k points nearest to q, nearest first."""
+        q = np.asarray(q, dtype=float)
+        best_ids = np.empty(0, dtype=np.intp)
+        best_d = np.empty(0)
+
+        def merge(ids, d):
+            nonlocal best_ids, best_d
+            ids = np.concatenate([best_ids, ids])
+            d = np.concatenate([best_d, d])
+            if d.size > k:
+                keep = np.argpartition(d, k - 1)[:k]
+                ids, d = ids[keep], d[keep]
+            best_ids, best_d = ids, d
+
+        def kth():
+            return best_d.max() if best_d.size == k else np.inf
+
+        # Overflow first, so the ball scan starts with a bound
+        n_extra = self.overflow
+        if n_extra:
+            diff = self._extra_points[:n_extra] - q
+            merge(self._extra_ids[:n_extra], np.sqrt(np.einsum("ij,ij->i", diff, diff)))
+
+        if self.size:
+            q_sqnorm = q @ q
+            # Closest any point of a ball can be: distance to its center minus its radius
+            gaps = np.sqrt(((self._centers - q) ** 2).sum(axis=1)) - self._radii
+            for b in np.argsort(gaps):
+                if gaps[b] >= kth():
+                    break
+                s, e = self._starts[b], self._ends[b]
+                if e == s:
+                    continue
+                sq = self._sqnorms[s:e] - 2.0 * (self._points[s:e] @ q) + q_sqnorm
+                merge(self._ids[s:e], np.sqrt(np.maximum(sq, 0.0)))
+
+        order = np.argsort(best_d, kind="stable")
+        alive = np.isfinite(best_d[order])
+        return best_ids[order][alive], best_d[order][alive]
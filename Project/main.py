@@ -1,12 +1,7 @@
+import os
 import platform
 import ctypes
-
-# --- DPI awareness (same as your original) ---
-if platform.system() == "Windows":
-    try:
-        ctypes.windll.shcore.SetProcessDpiAwareness(2)
-    except Exception as e:
-        print(f"[Warning] Could not set DPI awareness: {e}")
+import sys
 
 # --- ImGui + GLFW stack ---
 import glfw
@@ -19,6 +14,12 @@ import state as S
 import globals as G
 import style
 import dx7_bridge
+import spatial
+import profiler
+import gpu_nodes
+import heatmap
+import embedding
+import morph
 
 # Simple helper for colors: 0–255 -> ImGui RGBA (0–1)
 def rgba_f(r, g, b, a=255):
@@ -32,11 +33,107 @@ def rgba_u32(r, g, b, a=255):
 # Drag state for pad circles
 PAD_DRAG = {
     "active": False,     # whether a drag is in progress
-    "idx": None,         # index of the preset being dragged
+    "idx": None,         # index of the preset being dragged (the one under the mouse)
+    "rows": None,        # (k,) every preset moving with it: the selection, if idx is part of it
+    "start_unit": None,  # (k, D) those presets in unit space at drag start
+    "extent": None,      # (2, D) per-parameter min and max of start_unit
     "start_mouse": (0.0, 0.0),
     "start_tx_ty": (0.0, 0.0),  # normalized plane coords at drag start
 }
 
+# Screen-space index over the preset nodes, rebuilt only when the view or projection changes
+PAD_INDEX = spatial.GridIndex(cell_size=16.0)
+PAD_INDEX_KEY = {
+    "view": None,        # (zoom, offset, pad origin) the index was built for
+    "projection": None,  # positions_key (projection or layout version) the index was built from
+}
+
+# Instanced GL renderer for the preset nodes (None -> imgui draw list only).
+# Used once a library has at least GPU_MIN_NODES presets; below that the draw list is cheap enough.
+NODE_RENDERER = None
+GPU_MIN_NODES = 256
+
+# Density heatmap replaces individual nodes when a view holds too many presets to read.
+# Two thresholds so zooming around the boundary doesn't flicker between modes.
+HEATMAP = heatmap.DensityHeatmap(bin_px=4)
+HEATMAP_MIN_VISIBLE = 20000   # switch to the heatmap above this many presets in view
+HEATMAP_EXIT_VISIBLE = 14000  # and back to nodes below this
+HEATMAP_MODE = {
+    "active": False,
+    "key": None,      # (view, projection) the visible count was taken for
+    "visible": 0,     # presets inside the pad for that key
+}
+
+def update_density_mode(view_key, positions_key, xs, ys, rect) -> bool:
+    """Recount presets in view when the view or the preset positions changed and decide heatmap vs nodes."""
+    key = (view_key, positions_key)
+    if HEATMAP_MODE["key"] != key:
+        x1, y1, x2, y2 = rect
+        HEATMAP_MODE["visible"] = int(np.count_nonzero((xs >= x1) & (xs <= x2) & (ys >= y1) & (ys <= y2)))
+        HEATMAP_MODE["key"] = key
+
+        limit = HEATMAP_EXIT_VISIBLE if HEATMAP_MODE["active"] else HEATMAP_MIN_VISIBLE
+        HEATMAP_MODE["active"] = HEATMAP_MODE["visible"] > limit
+    return HEATMAP_MODE["active"]
+
+# Nonlinear layout mode: the pad shows precomputed 2D coordinates instead of the slice
+LAYOUT = {
+    "active": False,
+    "job": None,        # embedding.EmbeddingJob for the library it was started on
+    "hash": None,       # library hash of that job
+    "cache_dir": embedding.CACHE_DIR,  # where layouts are cached: next to the library, like its parse cache
+    "coords": None,     # (V,2) pad coordinates, including presets added after the job
+    "key": None,        # (job version, V) coords were built for
+    "version": 0,       # bumped whenever coords change
+    "cursor": None,     # (u,v) of the point last auditioned on the layout
+}
+# Control-rate glide toward the active preset, and timed A->B morphs (run by the OSC thread)
+MORPH = morph.MorphEngine(glide_time=0.03)
+MORPH_UI = {
+    "seconds": 2.0,     # duration of a timed morph
+}
+
+# Layout positions have no plane distance; a tiny one draws full-size nodes without the on-plane dot
+LAYOUT_DIST = 1e-3
+
+def start_layout():
+    """Switch the pad to the nonlinear layout, (re)computing it if the library changed."""
+    lib_hash = embedding.library_hash(S.Presets, S.mins, S.maxs)
+    if LAYOUT["hash"] != lib_hash:
+        if LAYOUT["job"] is not None:
+            LAYOUT["job"].cancel()
+        LAYOUT["job"] = embedding.EmbeddingJob(np.array(S.get_unit_presets(), dtype=float), lib_hash,
+                                               cache_dir=LAYOUT["cache_dir"])
+        LAYOUT["hash"] = lib_hash
+        LAYOUT["key"] = None
+    LAYOUT["active"] = True
+    LAYOUT["cursor"] = None
+
+def layout_positions():
+    """(V,2) pad coordinates from the layout job, or None until its first result."""
+    job = LAYOUT["job"]
+    layout = job.poll()
+    if layout is None:
+        return None
+
+    V = len(S.Presets)
+    key = (job.version, V)
+    if LAYOUT["key"] != key:
+        coords = np.empty((V, 2))
+        n = min(V, len(layout))
+        coords[:n] = layout[:n]
+        # Presets added since the job started sit among their nearest laid-out neighbours
+        for i in range(n, V):
+            # Ask for enough neighbours that PLACE_NEIGHBOURS of them have layout positions
+            neighbours, d = S.nearest_presets(S.Presets[i], embedding.PLACE_NEIGHBOURS + (V - n))
+            keep = neighbours < n
+            w = 1.0 / np.maximum(d[keep], 1e-9) ** 2
+            coords[i] = (w / w.sum()) @ layout[neighbours[keep]] if keep.any() else (0.5, 0.5)
+        LAYOUT["coords"] = coords
+        LAYOUT["key"] = key
+        LAYOUT["version"] += 1
+    return LAYOUT["coords"]
+
 # ---------- PAD DRAWING (ImGui draw list) ----------
 def draw_pad():
     """
@@ -51,14 +148,7 @@ def draw_pad():
 
     draw_list = imgui.get_window_draw_list()
 
-    # Background rounded rectangle
-    bg_col = rgba_u32(36, 36, 36)
-    border_col = rgba_u32(42, 42, 42)
-    draw_list.add_rect_filled(pad_x, pad_y, pad_x2, pad_y2, bg_col, rounding=18)
-    
     mouse_over_pad = imgui.is_mouse_hovering_rect(pad_x, pad_y, pad_x2, pad_y2)
-    
-    draw_list.add_rect(pad_x, pad_y, pad_x2, pad_y2, border_col, rounding=18, thickness=1.0)
 
     # --- Coordinate Transforms ---
     pad_inner_w = G.PAD_W - 2 * G.PAD_MARGIN
@@ -108,93 +198,138 @@ def draw_pad():
     # Clip drawing to pad area
     draw_list.push_clip_rect(pad_x, pad_y, pad_x2, pad_y2, True)
 
+    # --- Sample points (your projection, or the nonlinear layout) ---
+    with profiler.stage("pad/projection"):
+        presets_2d = layout_positions() if LAYOUT["active"] else None
+        if presets_2d is not None:
+            layout_mode = True
+            dists = np.full(len(presets_2d), LAYOUT_DIST)
+            positions_key = ("layout", LAYOUT["version"])
+        else:
+            layout_mode = False
+            presets_2d, dists = S.get_presets_on_plane()  # shape (V, 2)
+            positions_key = S.projection_version
+    view_key = (S.pad_zoom, S.pad_offset, pad_x, pad_y)
+    pad_rect = (pad_x, pad_y, pad_x2, pad_y2)
+    density_mode = False
+
+    if presets_2d is not None:
+        # Screen positions for every preset at once
+        preset_xs, preset_ys = unit_to_screen(presets_2d[:, 0], presets_2d[:, 1])
+        with profiler.stage("pad/heatmap"):
+            density_mode = update_density_mode(view_key, positions_key, preset_xs, preset_ys, pad_rect)
+
+    # With the GPU batch, the nodes and everything under them are painted in GL before
+    # imgui renders, so whatever imgui draws in the pad stays on top of the nodes
+    gpu_pass = NODE_RENDERER is not None and not density_mode and presets_2d is not None and len(presets_2d) >= GPU_MIN_NODES
+
+    # Background rounded rectangle
+    bg_col = (36, 36, 36)
+    if gpu_pass:
+        NODE_RENDERER.fill(gpu_nodes.rounded_rect(pad_rect, 18), (*bg_col, 255), pad_rect)
+    else:
+        draw_list.add_rect_filled(pad_x, pad_y, pad_x2, pad_y2, rgba_u32(*bg_col), rounding=18)
+    draw_list.add_rect(pad_x, pad_y, pad_x2, pad_y2, rgba_u32(42, 42, 42), rounding=18, thickness=1.0)
+
+    if presets_2d is not None:
+        # --- 0. Density heatmap, under the slice polygon, when too many presets are in view ---
+        with profiler.stage("pad/heatmap"):
+            if density_mode:
+                HEATMAP.update((view_key, positions_key), preset_xs, preset_ys, dists, (pad_x, pad_y, pad_x2, pad_y2))
+                draw_list.add_image(HEATMAP.texture, (pad_x, pad_y), (pad_x2, pad_y2))
+
     # --- 1. Draw Valid Slice Region ---
-    poly_verts = S.get_slice_polygon_vertices()
-    if len(poly_verts) > 2:
-        screen_poly = []
-        for u, v in poly_verts:
-            sx, sy = unit_to_screen(u, v)
-            screen_poly.append((sx, sy))
+    with profiler.stage("pad/polygon"):
+        poly_verts = S.get_slice_polygon_vertices() if not layout_mode else []
+        if len(poly_verts) > 2:
+            screen_poly = []
+            for u, v in poly_verts:
+                sx, sy = unit_to_screen(u, v)
+                screen_poly.append((sx, sy))
             
-        # Draw filled polygon
-        poly_col = rgba_u32(60, 60, 70, 100) 
-        
-        # Use path API for filled convex polygon
-        draw_list.path_clear()
-        for sx, sy in screen_poly:
-            draw_list.path_line_to(sx, sy)
-        draw_list.path_fill_convex(poly_col)
+            # Draw filled polygon
+            poly_col = (60, 60, 70, 100)
+            if gpu_pass:
+                NODE_RENDERER.fill(screen_poly, poly_col, pad_rect)
+            else:
+                # Use path API for filled convex polygon
+                draw_list.path_clear()
+                for sx, sy in screen_poly:
+                    draw_list.path_line_to(sx, sy)
+                draw_list.path_fill_convex(rgba_u32(*poly_col))
         
-        # Draw outline
-        outline_col = rgba_u32(100, 100, 120, 200)
-        # Use path API to ensure consistent stroke behavior across versions.
-        draw_list.path_clear()
-        for sx, sy in screen_poly:
-            draw_list.path_line_to(sx, sy)
-        draw_list.path_stroke(outline_col, flags=imgui.DRAW_CLOSED, thickness=1.5)
+            # Draw outline
+            outline_col = rgba_u32(100, 100, 120, 200)
+            # Use path API to ensure consistent stroke behavior across versions.
+            draw_list.path_clear()
+            for sx, sy in screen_poly:
+                draw_list.path_line_to(sx, sy)
+            draw_list.path_stroke(outline_col, flags=imgui.DRAW_CLOSED, thickness=1.5)
 
     # --- 2. Grid dots ---
-    dot_col = rgba_u32(54, 54, 54)
+    with profiler.stage("pad/grid_dots"):
+        dot_col = (54, 54, 54)
     
-    # Calculate visible range in unit space
-    vis_u_min, vis_v_min = screen_to_unit(pad_x, pad_y2) # Bottom-left screen
-    vis_u_max, vis_v_max = screen_to_unit(pad_x2, pad_y) # Top-right screen
+        # Calculate visible range in unit space
+        vis_u_min, vis_v_min = screen_to_unit(pad_x, pad_y2) # Bottom-left screen
+        vis_u_max, vis_v_max = screen_to_unit(pad_x2, pad_y) # Top-right screen
     
-    # Ensure min < max
-    if vis_u_min > vis_u_max: vis_u_min, vis_u_max = vis_u_max, vis_u_min
-    if vis_v_min > vis_v_max: vis_v_min, vis_v_max = vis_v_max, vis_v_min
+        # Ensure min < max
+        if vis_u_min > vis_u_max: vis_u_min, vis_u_max = vis_u_max, vis_u_min
+        if vis_v_min > vis_v_max: vis_v_min, vis_v_max = vis_v_max, vis_v_min
 
-    # Round to nearest grid step
-    grid_step = 1.0 / 8.0 
+        # Round to nearest grid step
+        grid_step = 1.0 / 8.0 
     
-    start_i = int(np.floor(vis_u_min / grid_step))
-    end_i = int(np.ceil(vis_u_max / grid_step))
-    start_j = int(np.floor(vis_v_min / grid_step))
-    end_j = int(np.ceil(vis_v_max / grid_step))
-
-    # Limit grid drawing to avoid freezing if zoomed out too much
-    if (end_i - start_i) * (end_j - start_j) < 10000:
-        for i in range(start_i, end_i + 1):
-            for j in range(start_j, end_j + 1):
-                u = i * grid_step
-                v = j * grid_step
-                
-                if S.is_point_valid(u, v):
-                    sx, sy = unit_to_screen(u, v)
-                    draw_list.add_circle_filled(sx, sy, 2.0, dot_col)
+        start_i = int(np.floor(vis_u_min / grid_step))
+        end_i = int(np.ceil(vis_u_max / grid_step))
+        start_j = int(np.floor(vis_v_min / grid_step))
+        end_j = int(np.ceil(vis_v_max / grid_step))
+
+        # Limit grid drawing to avoid freezing if zoomed out too much
+        if (end_i - start_i) * (end_j - start_j) < 10000 and not layout_mode:
+            # Validity of the whole lattice is cached in state; only valid dots are emitted
+            dot_us, dot_vs = S.get_valid_grid_points(start_i, end_i, start_j, end_j, grid_step)
+            dot_xs, dot_ys = unit_to_screen(dot_us, dot_vs)
+            if gpu_pass:
+                NODE_RENDERER.queue(gpu_nodes.disc_instances(dot_xs, dot_ys, 2.0, (*dot_col, 255)), pad_rect)
+            else:
+                for sx, sy in zip(dot_xs, dot_ys):
+                    draw_list.add_circle_filled(sx, sy, 2.0, rgba_u32(*dot_col))
 
-    # --- Sample points (your projection) ---
-    presets_2d, dists = S.get_presets_on_plane()  # shape (V, 2)
     if presets_2d is None:
         draw_list.pop_clip_rect()
         return
     white = rgba_u32(255, 255, 255)
-    any_hovered = False
 
-    for idx, ((tx, ty), dist, col) in enumerate(zip(presets_2d, dists, S.preset_colors)):
-        x, y = unit_to_screen(tx, ty)
-        
-        selected: bool = idx in S.selection
-        is_on_plane: bool = dist < 1e-5
-        
-        r = 8
-        is_hovered = S.is_cursor_within_circle((x, y), r)
-        if is_hovered:
-            r += 2  # slightly larger on hover
-            any_hovered = True
-        
+    # --- Hit-testing: only the grid cells around the cursor are checked ---
+    with profiler.stage("pad/hit_test"):
+        if PAD_INDEX_KEY["view"] != view_key or PAD_INDEX_KEY["projection"] != positions_key:
+            PAD_INDEX.build(preset_xs, preset_ys)
+            PAD_INDEX_KEY["view"] = view_key
+            PAD_INDEX_KEY["projection"] = positions_key
+
+        hovered_idx = PAD_INDEX.topmost(G.mouse_pos[0], G.mouse_pos[1], 8) if mouse_over_pad else None
+
+    def node_interaction(idx, tx, ty, is_hovered):
+        """Selection, dragging and the slider guide line for one node; shared by both node renderers."""
         if G.mouse_clicked and is_hovered:
-            S.record_selection(idx)
-        
-        # Drag start: click on a hovered circle
-        if is_hovered and G.mouse_down and not PAD_DRAG["active"]:          
+            # Pressing on a node of a multi-selection keeps the group, so it can be dragged together
+            if not (idx in S.selection and len(S.selection) > 1 and not imgui.get_io().key_ctrl):
+                S.record_selection(idx)
+
+        # Drag start: click on a hovered circle (layout positions aren't a plane, so no dragging there)
+        if is_hovered and G.mouse_down and not PAD_DRAG["active"] and not layout_mode:          
             if not imgui.get_io().key_ctrl:  # hold Ctrl to multi-select
                 PAD_DRAG["active"] = True
                 PAD_DRAG["dragging"] = False
                 PAD_DRAG["idx"] = idx
                 PAD_DRAG["start_mouse"] = G.mouse_pos
                 PAD_DRAG["start_tx_ty"] = (tx, ty)
-                PAD_DRAG["start_value"] = S.Presets[idx, :].copy()
+                rows = sorted(S.selection) if idx in S.selection else [idx]
+                PAD_DRAG["rows"] = np.array(rows, dtype=int)
+                PAD_DRAG["start_unit"] = S.get_unit_presets()[PAD_DRAG["rows"]].astype(float)
+                PAD_DRAG["extent"] = np.stack([PAD_DRAG["start_unit"].min(axis=0), PAD_DRAG["start_unit"].max(axis=0)])
 
         # If this preset is the one being dragged, compute new position
         if PAD_DRAG["active"] and PAD_DRAG["idx"] == idx:
@@ -203,58 +338,66 @@ def draw_pad():
                 sx, sy = PAD_DRAG["start_mouse"]
                 dx = mx - sx
                 dy = my - sy
-                
+            
                 # Convert pixel delta into normalized pad delta (taking zoom into account)
                 norm_dx = dx / (pad_inner_w * S.pad_zoom)
                 norm_dy = -dy / (pad_inner_h * S.pad_zoom)  # Y is inverted
-                
+            
                 new_tx = PAD_DRAG["start_tx_ty"][0] + norm_dx
                 new_ty = PAD_DRAG["start_tx_ty"][1] + norm_dy
                 # clamp 0..1
                 new_tx = min(max(new_tx, 0.0), 1.0)
                 new_ty = min(max(new_ty, 0.0), 1.0)
-                
+            
                 if not PAD_DRAG["dragging"]:
                     dist_from_start = ((mx - sx) ** 2 + (my - sy) ** 2)
                     if dist_from_start > 1:
                         PAD_DRAG["dragging"] = True
                 else:
-                    # A. Get the Starting Real Value
-                    start_real = PAD_DRAG["start_value"]
-                    
-                    # B. Convert Start Value to Normalized Space (0.0 to 1.0)
-                    start_norm = S.to_unit(start_real, S.mins, S.maxs)
-                    
+                    # A-B. Starting values of every dragged preset, in normalized space (0.0 to 1.0)
+                    start_norm = PAD_DRAG["start_unit"]
 
                     # C. Calculate the Delta Vector in High-D Normalized Space
                     # This maps the 2D pad movement onto the high-D hypercube
                     # Basis vectors are usually unit-length in normalized space
                     delta_tx = norm_dx 
                     delta_ty = norm_dy 
-                    
+                
                     # Movement vector in N-dimensions
                     movement_nd = (S.Basis[0, :] * delta_tx) + (S.Basis[1, :] * delta_ty)
 
-                    # D. Apply movement
-                    target_norm = start_norm + movement_nd
-
-                    # E. Clamp values to valid 0.0-1.0 range using ray casting to stop at edges
-                    new_norm = S.clamp_movement(start_norm, target_norm)
+                    # D-E. Apply movement to all k rows at once, clamped to the valid 0.0-1.0 range
+                    # using ray casting to stop at edges
+                    if imgui.get_io().key_shift:
+                        # Shift: every preset slides on until it reaches its own edge
+                        new_norm = S.clamp_movement(start_norm, start_norm + movement_nd)
+                    else:
+                        # The group moves rigidly and stops when its first member reaches an edge.
+                        # That member sets the group's min or max along the parameter, so casting
+                        # from the group's per-parameter extent gives the same stop in O(D)
+                        t = S.movement_limit(PAD_DRAG["extent"], movement_nd, shared=True)
+                        new_norm = start_norm + t * movement_nd
 
                     # F. Convert back to Real Units
-                    S.Presets[idx, :] = S.from_unit(new_norm, S.mins, S.maxs)
-                    
+                    S.set_presets(PAD_DRAG["rows"], S.from_unit(new_norm, S.mins, S.maxs))
+                
             else:
                 # mouse released -> end drag
+                if not PAD_DRAG["dragging"] and len(PAD_DRAG["rows"]) > 1 and not imgui.get_io().key_ctrl:
+                    # A click on a group that didn't turn into a drag selects just that node
+                    S.record_selection(idx)
                 PAD_DRAG["active"] = False
                 PAD_DRAG["dragging"] = False
                 PAD_DRAG["idx"] = None
+                PAD_DRAG["rows"] = None
+                PAD_DRAG["start_unit"] = None
+                PAD_DRAG["extent"] = None
 
-        if selected:
+        if idx in S.selection and not layout_mode:
             # draw a line across the pad at the slider's value
             if S.hovered_parameter_slider != -1:
                 slope_u, slope_v = S.get_slope_of_parameter_in_plane(S.hovered_parameter_slider)
-                
+            
                 if not (slope_u == 0 and slope_v == 0):
                     line_col = rgba_u32(255, 130, 0)
 
@@ -262,7 +405,7 @@ def draw_pad():
                     # v - ty = m * (u - tx)
                     # We pick two points far away to ensure they cover the view
                     u1, u2 = -100.0, 100.0
-                    
+                
                     if abs(slope_u) < 1e-8:
                         # Vertical line at u = tx
                         sx1, sy1 = unit_to_screen(tx, -100.0)
@@ -273,25 +416,62 @@ def draw_pad():
                         v2 = ty + m * (u2 - tx)
                         sx1, sy1 = unit_to_screen(u1, v1)
                         sx2, sy2 = unit_to_screen(u2, v2)
-                        
+                    
                     draw_list.add_line(sx1, sy1, sx2, sy2, line_col, thickness=2.0)
-            
-            dist_inv = 1.0 - dist
-            dist_inv = round(dist_inv ** 5, 5)  # emphasize closeness
-            
-            draw_list.add_circle_filled(x, y, (r + 3) * dist_inv, white)
 
+    # Clicks on empty pad space only count when no node is under the cursor
+    any_hovered = hovered_idx is not None
+
+    def draw_node(idx, x, y, dist, col, is_hovered):
+        """Draws one preset node with the imgui draw list."""
+        r = 10 if is_hovered else 8  # slightly larger on hover
         dist_inv = 1.0 - dist
         dist_inv = round(dist_inv ** 5, 5) # emphasize closeness
-        
+
+        if idx in S.selection:
+            draw_list.add_circle_filled(x, y, (r + 3) * dist_inv, white)
+
         cr, cg, cb = col[:3]
         draw_list.add_circle_filled(x, y, r * dist_inv, rgba_u32(cr, cg, cb))
-        
-        if is_on_plane:
-            draw_list.add_circle_filled(x, y, 2 * dist_inv, rgba_u32(255,255,255))
+
+        if dist < 1e-5: # on the plane
+            draw_list.add_circle_filled(x, y, 2 * dist_inv, white)
+
+    with profiler.stage("pad/presets"):
+        if density_mode or gpu_pass:
+            # Python only touches selected/hovered/dragged nodes; the rest is the heatmap or one instanced draw
+            active = set(S.selection)
+            if hovered_idx is not None:
+                active.add(hovered_idx)
+            if PAD_DRAG["active"] and PAD_DRAG["idx"] is not None:
+                active.add(PAD_DRAG["idx"])
+            for idx in sorted(active):
+                tx, ty = presets_2d[idx]
+                node_interaction(idx, tx, ty, idx == hovered_idx)
+
+            if density_mode:
+                # Keep the nodes the user is working with visible on top of the heatmap
+                for idx in sorted(active):
+                    draw_node(idx, preset_xs[idx], preset_ys[idx], dists[idx], S.preset_colors[idx], idx == hovered_idx)
+            else:
+                selected = np.zeros(len(presets_2d), dtype=bool)
+                selected[list(S.selection)] = True
+                NODE_RENDERER.queue(
+                    gpu_nodes.build_node_instances(preset_xs, preset_ys, dists, S.preset_colors, selected,
+                                                   hovered_idx, pad_rect, S.pad_zoom),
+                    pad_rect)
+        else:
+            for idx, ((tx, ty), x, y, dist, col) in enumerate(zip(presets_2d, preset_xs, preset_ys, dists, S.preset_colors)):
+                is_hovered = idx == hovered_idx
+                node_interaction(idx, tx, ty, is_hovered)
+                draw_node(idx, x, y, dist, col, is_hovered)
 
     # Mouse interaction for creating/selecting
     mouse_pad_x, mouse_pad_y = screen_to_unit(G.mouse_pos[0], G.mouse_pos[1])
+
+    # Playing on the pad takes over from a timed morph
+    if mouse_over_pad and G.mouse_clicked:
+        MORPH.cancel()
     
     # Mouse is over pad
     if mouse_over_pad and not any_hovered:
@@ -299,11 +479,28 @@ def draw_pad():
             S.active_preset_value = None
             S.selection = set()
         if G.mouse_down:
-            S.active_preset_value = S.get_preset_from_coordinates(mouse_pad_x, mouse_pad_y)
+            if layout_mode:
+                # Lift the layout point back to D dimensions from the presets around it
+                S.active_preset_value = embedding.lift(mouse_pad_x, mouse_pad_y, presets_2d, S.Presets)
+                LAYOUT["cursor"] = (mouse_pad_x, mouse_pad_y)
+            else:
+                S.active_preset_value = S.get_preset_from_coordinates(mouse_pad_x, mouse_pad_y)
             
             
     if S.selection == set() and S.active_preset_value is not None:
-        (x, y), dist = S.project_point_on_plane(S.active_preset_value)
+        if G.mouse_down:
+            # While auditioning, ring the stored presets closest to what's playing
+            with profiler.stage("pad/neighbours"):
+                neighbours, _ = S.nearest_presets(S.active_preset_value, NEIGHBOUR_COUNT)
+                neighbour_col = rgba_u32(255, 130, 0, 220)
+                for idx in neighbours:
+                    draw_list.add_circle(preset_xs[idx], preset_ys[idx], 13, neighbour_col, thickness=2.0)
+
+        if layout_mode:
+            x, y = LAYOUT["cursor"] or (-1e3, -1e3)  # off the pad if nothing was auditioned on the layout
+            dist = LAYOUT_DIST
+        else:
+            (x, y), dist = S.project_point_on_plane(S.active_preset_value)
         px, py = unit_to_screen(x, y)
         r = 8
         is_on_plane: bool = dist < 1e-5
@@ -311,7 +508,7 @@ def draw_pad():
         draw_list.add_circle_filled(px, py, r + 3, white)
         draw_list.add_circle_filled(px, py, r, rgba_u32(155, 155, 155, 255))
         if is_on_plane:
-            draw_list.add_circle_filled(x, y, 2 * dist_inv, rgba_u32(255,255,255))
+            draw_list.add_circle_filled(px, py, 2, white)
         
     draw_list.pop_clip_rect()
 
@@ -355,6 +552,9 @@ def draw_inspector():
         if imgui.button("Define plane from these 3 presets"):
             S.assign_basis_from_three_presets(list(S.selection))
         
+        return
+    elif(len(S.selection) == 2):
+        draw_morph_controls(*sorted(S.selection))
         return
     elif(len(S.selection) > 1):
         imgui.text("Multiple presets selected.")
@@ -398,7 +598,7 @@ def draw_inspector():
             if inspecting_unsaved_point: # unsaved active preset
                 S.active_preset_value[i] = new_val
             else:
-                S.Presets[selected_idx, i] = new_val
+                S.update_preset_parameter_index(selected_idx, i, new_val)
 
         imgui.same_line()
         imgui.text(str(max))
@@ -411,18 +611,91 @@ def draw_inspector():
         S.add_parameter(f"param{len(S.param_names)+1}")
 
 
+# How many nearest stored presets to highlight while auditioning
+NEIGHBOUR_COUNT = 5
+
+# Search box state for the preset list
+PRESET_FILTER = {
+    "query": "",
+    "rows": None,        # preset indices matching the query
+    "key": None,         # (query, preset count) the rows were computed for
+}
+
 def draw_presets():
-        # Bottom: presets list
+    """Preset list with a search box. Only the rows inside the scroll view are submitted."""
     header("Presets")
-    for idx in range(len(S.preset_names)):
-        draw_preset_row(idx)
-    
-    if S.selection == set() and S.active_preset_value is not None:
+    S.preset_name_index.index_step()  # a slice of any newly loaded names per frame
+
+    imgui.push_item_width(-1)
+    _, PRESET_FILTER["query"] = imgui.input_text_with_hint("##preset_search", "Search presets", PRESET_FILTER["query"], 256)
+    imgui.pop_item_width()
+
+    key = (PRESET_FILTER["query"], len(S.preset_names))
+    if PRESET_FILTER["key"] != key:
+        PRESET_FILTER["rows"] = S.preset_name_index.search(PRESET_FILTER["query"])
+        PRESET_FILTER["key"] = key
+    rows = PRESET_FILTER["rows"]
+
+    show_add_button = S.selection == set() and S.active_preset_value is not None
+
+    # Leave room below the list for the add button
+    imgui.begin_child("preset_list", 0, -34 if show_add_button else 0, border=False)
+    row_h = imgui.get_text_line_height_with_spacing()
+    first = int(imgui.get_scroll_y() // row_h)
+    last = min(len(rows), first + int(imgui.get_window_height() // row_h) + 2)
+
+    # Jump over the rows above the view, then reserve the full height so the scrollbar stays right
+    top = imgui.get_cursor_pos_y()
+    imgui.set_cursor_pos_y(top + first * row_h)
+    for idx in rows[first:last]:
+        draw_preset_row(int(idx))
+    imgui.set_cursor_pos_y(top + len(rows) * row_h)
+    imgui.end_child()
+
+    if show_add_button:
         # "Add preset" pill button
         if imgui.button("+##add_preset", width=26, height=26):
             print("Added new preset from unsaved active preset.")
             S.add_preset(f"preset {len(S.preset_names)+1}", value=S.active_preset_value)
 
+def draw_morph_controls(a: int, b: int):
+    """Timed morph between the two selected presets, either way round."""
+    _, MORPH_UI["seconds"] = imgui.slider_float("Morph time##morph_seconds", MORPH_UI["seconds"], 0.1, 20.0, "%.1f s")
+    for start, end in ((a, b), (b, a)):
+        if imgui.button(f"{S.preset_names[start]}  ->  {S.preset_names[end]}##morph_{start}_{end}"):
+            MORPH.morph(S.Presets[start], S.Presets[end], MORPH_UI["seconds"])
+            # Where the morph lands is what the glide holds afterwards
+            S.active_preset_value = S.Presets[end].copy()
+    if MORPH.morphing:
+        imgui.text_disabled("morphing...")
+
+def draw_view_toolbar():
+    """Buttons under the pad that change the view."""
+    if imgui.button("Recenter PCA view"):
+        # From running statistics, so this stays instant for large libraries
+        S.assign_pca_basis()
+        LAYOUT["active"] = False
+        S.pad_zoom = 1.0
+        S.pad_offset = (0.0, 0.0)
+    if imgui.is_item_hovered():
+        imgui.set_tooltip("Show the slice through the two main directions of variation of all presets")
+
+    imgui.same_line()
+    changed, on = imgui.checkbox("Nonlinear layout", LAYOUT["active"])
+    if changed:
+        if on:
+            start_layout()
+        else:
+            LAYOUT["active"] = False
+    if imgui.is_item_hovered():
+        imgui.set_tooltip("Lay presets out by similarity (MDS) instead of slicing the space")
+
+    job = LAYOUT["job"]
+    if LAYOUT["active"] and job is not None and not job.done:
+        imgui.same_line()
+        stress = "" if job.stress is None else f", stress {job.stress:.3f}"
+        imgui.text_disabled(f"computing layout: {job.iterations} iterations{stress}")
+
 # ---------- MAIN WINDOW BUILD ----------
 def draw_main_window():
     # Set position & size to match the layout
@@ -434,26 +707,48 @@ def draw_main_window():
         | imgui.WINDOW_NO_MOVE
         | imgui.WINDOW_NO_RESIZE
     )
+    # GL-drawn nodes sit under the imgui frame, so nothing may paint over the pad area
+    # beneath them; the clear color stands in for the window background
+    see_through = imgui.WINDOW_NO_BACKGROUND if NODE_RENDERER is not None else 0
 
-    imgui.begin("Slice Explorer UI", flags=flags)
+    imgui.begin("Slice Explorer UI", flags=flags | see_through)
 
-    # LEFT: pad
-    imgui.begin_child("pad_child", width=G.PAD_W, height=G.PAD_H, border=False)
-    draw_pad()
+    # LEFT: pad + view toolbar
+    imgui.begin_group()
+    imgui.begin_child("pad_child", width=G.PAD_W, height=G.PAD_H, border=False, flags=see_through)
+    with profiler.stage("draw_pad"):
+        draw_pad()
     imgui.end_child()
+    draw_view_toolbar()
+    imgui.end_group()
 
     imgui.same_line()
 
     # RIGHT: panel
     imgui.begin_child("right_panel", width=340, height=G.PAD_H, border=False)
-    draw_inspector()
+    with profiler.stage("draw_inspector"):
+        draw_inspector()
     imgui.spacing()
     imgui.spacing()
-    draw_presets()
+    with profiler.stage("draw_presets"):
+        draw_presets()
     imgui.end_child()
 
     imgui.end()
 
+    # Ctrl+Z / Ctrl+Y (or Ctrl+Shift+Z): undo / redo preset edits
+    io = imgui.get_io()
+    if io.key_ctrl and not io.want_text_input:
+        if imgui.is_key_pressed(glfw.KEY_Z):
+            S.redo() if io.key_shift else S.undo()
+        elif imgui.is_key_pressed(glfw.KEY_Y):
+            S.redo()
+
+    # F3 toggles the frame profiler overlay
+    if imgui.is_key_pressed(glfw.KEY_F3, repeat=False):
+        profiler.toggle_overlay()
+    profiler.draw_overlay()
+
 
 # ---------- GLFW + ImGui loop ----------
 def create_window():
@@ -475,9 +770,26 @@ def create_window():
     return window
 
 
+def set_dpi_awareness():
+    """DPI awareness (same as your original). Called from main(), not on import: the layout
+    worker processes (embedding.py) are spawned and re-import this module."""
+    if platform.system() == "Windows":
+        try:
+            ctypes.windll.shcore.SetProcessDpiAwareness(2)
+        except Exception as e:
+            print(f"[Warning] Could not set DPI awareness: {e}")
+
 def main():
+    set_dpi_awareness()
     # init_state()
-    dx7_bridge.load_dx7_json("output.json")
+    # Optional argument: a converted .json library, a .syx bank or a folder of .syx banks.
+    # --float32 stores presets in single precision (half the memory, for very large libraries)
+    paths = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if "--float32" in sys.argv[1:]:
+        S.set_float32()
+    library = paths[0] if paths else "output.json"
+    dx7_bridge.load_dx7_library(library)
+    LAYOUT["cache_dir"] = os.path.dirname(dx7_bridge.get_cache_path(library))
 
     window = create_window()
 
@@ -485,40 +797,63 @@ def main():
     style.setup_style()
     impl = GlfwRenderer(window)
 
-    gl.glClearColor(0.1, 0.1, 0.1, 1.0)
+    gl.glClearColor(24 / 255, 24 / 255, 24 / 255, 1.0)  # COLOR_WINDOW_BACKGROUND in style.py
+
+    global NODE_RENDERER
+    try:
+        NODE_RENDERER = gpu_nodes.NodeRenderer()
+    except Exception as e:
+        print(f"[Warning] GPU node renderer unavailable, drawing nodes with imgui: {e}")
     
-    sender = dx7_bridge.DX7OSCClient(ip="127.0.0.1", port=57120)
+    # OSC goes out from its own thread at a fixed control rate; the loop below only publishes.
+    # The thread's tick is the rate limit, so the client's own limiter is turned off.
+    client = dx7_bridge.DX7OSCClient(ip="127.0.0.1", port=57120, min_interval=0.0)
+    sender = dx7_bridge.OSCSenderThread(client, rate_hz=200.0, engine=MORPH).start()
     
-    # Precompute PCA basis for initial view
-    unit_presets = S.to_unit(S.Presets, S.mins, S.maxs)
-    S.Basis = S.pca_basis(unit_presets, dim=2)
-    S.Slice_origin = np.mean(unit_presets, axis=0)
+    # Initial view: PCA of the library
+    S.assign_pca_basis()
+    S.rebuild_nearest_index()  # now rather than on the first audition
 
     # Main frame loop: everything is rebuilt every iteration.
     while not glfw.window_should_close(window):
-        glfw.poll_events()
-        impl.process_inputs()
+        profiler.begin_frame()
+        with profiler.stage("events"):
+            glfw.poll_events()
+            impl.process_inputs()
 
         imgui.new_frame()
         G.update_globals()
 
+        # Everything edited during one mouse gesture (a drag, a slider scrub) is one undo step
+        if G.mouse_clicked:
+            S.journal.begin_group()
+        if imgui.is_mouse_released(0):
+            S.journal.end_group()
+
         draw_main_window()
 
-        # Render
-        gl.glClear(gl.GL_COLOR_BUFFER_BIT)
-        imgui.render()
-        impl.render(imgui.get_draw_data())
-        glfw.swap_buffers(window)
-        
-        # send OSC updates
-        if S.active_preset_value is not None:
-            sender.send_active_preset(S.active_preset_value)
-            sender.send_gate(G.mouse_down)
-        else: 
-            sender.send_gate(False)
-        
-            
+        # Publish this frame's state to background threads, and hand the newest synth
+        # state to the OSC thread before rendering, so vsync doesn't delay it
+        with profiler.stage("osc_publish"):
+            snapshot = S.publish_snapshot()
+            MORPH.set_space(snapshot.param_names, snapshot.mins, snapshot.maxs)
+            sender.publish(snapshot.active, G.mouse_down or MORPH.morphing)
 
+        # Render
+        with profiler.stage("imgui.render"):
+            gl.glClear(gl.GL_COLOR_BUFFER_BIT)
+            if NODE_RENDERER is not None:
+                # What draw_pad queued goes under the imgui frame, clipped to the pad
+                io = imgui.get_io()
+                NODE_RENDERER.render(io.display_size, io.display_framebuffer_scale)
+            imgui.render()
+            impl.render(imgui.get_draw_data())
+        with profiler.stage("swap_buffers"):  # includes waiting for vsync
+            glfw.swap_buffers(window)
+
+    sender.stop()
+    if LAYOUT["job"] is not None:
+        LAYOUT["job"].cancel()
     impl.shutdown()
     glfw.terminate()
 
@@ -0,0 +1,115 @@
+"""
+Control-rate morphing of the synth parameter vector.
+
+The UI sets a target (the active preset) once per frame; the OSC sender thread
+calls MorphEngine.step() at its fixed control rate, so parameters glide toward the
+target at a rate that does not depend on the frame rate and never jump. Timed
+morphs move from preset A to preset B over a given number of seconds.
+
+Interpolation happens per parameter on a perceptual curve: parameters heard on a
+logarithmic scale (pitch, LFO speed) are interpolated in log space, everything
+else linearly.
+"""
+
+import time
+
+import numpy as np
+
+# Parameter names (or name endings) interpolated on a log curve; they need positive bounds
+LOG_PARAMS = ("frequency_ratio_mode", "frequency_fixed_mode", "lfo_speed")
+
+
+def log_mask(param_names, mins, maxs) -> np.ndarray:
+    """(D,) bool: the parameters morphed in log space."""
+    named = np.array([name.endswith(LOG_PARAMS) for name in param_names], dtype=bool)
+    return named & (np.asarray(mins) > 0) & (np.asarray(maxs) > 0)
+
+def smoothstep(s: float) -> float:
+    """Ease in and out, so a timed morph starts and lands without a kink."""
+    return s * s * (3.0 - 2.0 * s)
+
+
+class MorphEngine:
+    """
+    Glides toward the target with a one-pole lag of time constant glide_time, or
+    plays a timed morph, which overrides the target until it ends.
+
+    step() belongs to the sender thread; set_space() and morph() are called from the
+    main thread and only swap single references, so neither side takes a lock.
+    """
+    def __init__(self, glide_time: float = 0.03):
+        self.glide_time = glide_time
+        self._space = None       # (param_names, mins, log mask) the curves were built for
+        self._request = None     # newest morph() request: (a, b, seconds, start time)
+        self._taken = None       # the last request step() picked up
+        self._playing = None     # the request step() is playing, if it hasn't ended
+        self._state = None       # current value, in curve space
+        self.morph_end = 0.0     # perf_counter time the newest timed morph ends
+
+    def set_space(self, param_names, mins, maxs):
+        """Parameter names and bounds the vectors follow. Cheap to call every frame with unchanged arrays."""
+        space = self._space
+        if space is not None and space[0] is param_names and space[1] is mins:
+            return
+        self._space = (param_names, mins, log_mask(param_names, mins, maxs))
+
+    def morph(self, a: np.ndarray, b: np.ndarray, seconds: float):
+        """Start a timed morph from a to b (parameter units), replacing any morph in progress."""
+        a = np.array(a, dtype=float)
+        b = np.array(b, dtype=float)
+        start = time.perf_counter()
+        self._request = (a, b, max(float(seconds), 1e-3), start)
+        self.morph_end = start + max(float(seconds), 1e-3)
+
+    def cancel(self):
+        """Stop a timed morph; the output glides on toward the target."""
+        self._request = None
+        self.morph_end = 0.0
+
+    @property
+    def morphing(self) -> bool:
+        return time.perf_counter() < self.morph_end
+
+    def _to_curve(self, vector, mask):
+        out = np.array(vector, dtype=float)
+        out[mask] = np.log(np.maximum(out[mask], 1e-12))
+        return out
+
+    def _from_curve(self, values, mask):
+        out = values.copy()
+        out[mask] = np.exp(out[mask])
+        return out
+
+    def step(self, target: np.ndarray | None, dt: float) -> np.ndarray | None:
+        """Advance by dt seconds toward target. Returns the vector to send (a new array), or None."""
+        space = self._space
+        if target is None or space is None or space[2].shape != np.shape(target):
+            self._state = None
+            return None if target is None else np.array(target, dtype=float)
+        mask = space[2]
+
+        request = self._request
+        if request is not self._taken:
+            self._taken = request
+            # A request made before the parameter set changed is dropped
+            self._playing = request if request is not None and request[0].shape == mask.shape else None
+
+        playing = self._playing
+        if playing is not None:
+            a, b, seconds, start = playing
+            s = (time.perf_counter() - start) / seconds
+            ya, yb = self._to_curve(a, mask), self._to_curve(b, mask)
+            if s >= 1.0:
+                self._state = yb
+                self._playing = None
+            else:
+                self._state = ya + (yb - ya) * smoothstep(max(s, 0.0))
+        else:
+            y = self._to_curve(target, mask)
+            if self._state is None or self._state.shape != y.shape:
+                self._state = y
+            else:
+                # One-pole lag: the same curve whatever the tick length
+                self._state = self._state + (y - self._state) * (1.0 - np.exp(-dt / max(self.glide_time, 1e-6)))
+
+        return self._from_curve(self._state, mask)
@@ -0,0 +1,81 @@
+"""
+Incremental substring search over preset names.
+"""
+
+import numpy as np
+
+GRAM = 3  # trigram index; shorter queries fall back to a scan
+
+
+class NameIndex:
+    """
+    Case-insensitive substring index over a growing list of names.
+
+    Every name is registered under each of its trigrams; a query intersects the
+    posting lists of its own trigrams and only verifies the few survivors.
+    Typing more characters refines the previous result instead of starting over.
+    Adding only stores the names; index_step() indexes them a slice at a time (call it
+    once per frame) so loading a large library never stalls a frame. Names not yet
+    indexed are still found, by a scan.
+    """
+    def __init__(self, names=()):
+        self._lower: list[str] = []
+        self._indexed = 0                         # names [0, _indexed) are in the postings
+        self._postings: dict[str, list[int]] = {}
+        self._arrays: dict[str, np.ndarray] = {}  # posting lists as arrays, built on first use
+        self._last_query = None
+        self._last_result = None
+        self.add(names)
+
+    def __len__(self):
+        return len(self._lower)
+
+    def add(self, names):
+        """Register names, continuing the id sequence (ids match list indices)."""
+        start = len(self._lower)
+        self._lower.extend(name.lower() for name in names)
+        if len(self._lower) > start:
+            self._last_query = None
+
+    def index_step(self, max_names: int = 2000) -> bool:
+        """Index up to max_names pending names. Returns True while names are still pending."""
+        stop = min(len(self._lower), self._indexed + max_names)
+        for i in range(self._indexed, stop):
+            lower = self._lower[i]
+            for gram in {lower[k:k + GRAM] for k in range(len(lower) - GRAM + 1)}:
+                self._postings.setdefault(gram, []).append(i)
+                self._arrays.pop(gram, None)
+        self._indexed = stop
+        return stop < len(self._lower)
+
+    def _posting(self, gram) -> np.ndarray:
+        array = self._arrays.get(gram)
+        if array is None:
+            array = self._arrays[gram] = np.array(self._postings.get(gram, ()), dtype=np.int64)
+        return array
+
+    def search(self, query: str) -> np.ndarray:
+        """Sorted ids of all names containing query (case-insensitive). Empty query matches everything."""
+        q = query.lower()
+        if not q:
+            return np.arange(len(self._lower))
+
+        if self._last_query is not None and self._last_query in q:
+            # Narrowing the last query: only its matches can still match
+            candidates = self._last_result
+        elif len(q) < GRAM:
+            candidates = range(len(self._lower))
+        else:
+            grams = sorted({q[k:k + GRAM] for k in range(len(q) - GRAM + 1)}, key=lambda g: len(self._postings.get(g, ())))
+            candidates = self._posting(grams[0])
+            for gram in grams[1:]:
+                if candidates.size == 0:
+                    break
+                candidates = np.intersect1d(candidates, self._posting(gram), assume_unique=True)
+            # Not yet indexed names are scanned
+            candidates = np.concatenate([candidates, np.arange(self._indexed, len(self._lower))])
+
+        lower = self._lower
+        result = np.fromiter((i for i in candidates if q in lower[i]), dtype=np.int64)
+        self._last_query, self._last_result = q, result
+        return result
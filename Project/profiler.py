@@ -0,0 +1,193 @@
+"""
+Per-stage frame profiler.
+
+Stages are timed with `with profiler.stage("name"):` and summed per frame into a
+fixed-size ring buffer (one row per frame, one column per stage). While disabled,
+stage() hands back a shared no-op context, so instrumented code costs next to nothing.
+"""
+
+import contextlib
+import csv
+import json
+import time
+import threading
+
+import numpy as np
+
+CAPACITY = 600     # frames kept in the ring (10 s at 60 fps)
+MAX_STAGES = 32
+
+enabled: bool = False
+show_overlay: bool = False
+
+_ring = np.full((CAPACITY, MAX_STAGES), np.nan)  # seconds per stage per frame
+_frame_ids = np.full(CAPACITY, -1, dtype=np.int64)
+_frame = -1                                      # id of the frame being recorded
+_stage_names: list[str] = []
+_stage_cols: dict[str, int] = {}
+_stages: dict[str, "_Stage"] = {}
+_register_lock = threading.Lock()                # stages can be first seen on other threads
+_NULL_STAGE = contextlib.nullcontext()
+
+
+class _Stage:
+    """Reusable timing context for one stage name."""
+    __slots__ = ("col", "start")
+
+    def __init__(self, col: int):
+        self.col = col
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.col, time.perf_counter() - self.start)
+        return False
+
+
+def set_enabled(on: bool):
+    """Turn recording on/off. Turning it on starts from an empty ring."""
+    global enabled
+    if on and not enabled:
+        clear()
+    enabled = on
+
+def clear():
+    global _frame
+    _ring.fill(np.nan)
+    _frame_ids.fill(-1)
+    _frame = -1
+
+def begin_frame():
+    """Start a new ring row. Call once at the top of the frame loop."""
+    global _frame
+    if not enabled:
+        return
+    _frame += 1
+    row = _frame % CAPACITY
+    _ring[row].fill(np.nan)
+    _frame_ids[row] = _frame
+
+def _column(name: str) -> int:
+    col = _stage_cols.get(name)
+    if col is None:
+        with _register_lock:
+            col = _stage_cols.get(name)
+            if col is None:
+                if len(_stage_names) >= MAX_STAGES:
+                    raise ValueError(f"profiler: more than {MAX_STAGES} stages")
+                col = len(_stage_names)
+                _stage_cols[name] = col
+                _stage_names.append(name)  # published last: readers slice the ring by len(_stage_names)
+    return col
+
+def register(name: str) -> int:
+    """Give a stage its column up front, e.g. on the main thread before a worker thread times it."""
+    return _column(name)
+
+def stage(name: str):
+    """Context manager timing a stage of the current frame. Repeated stages in a frame add up."""
+    if not enabled:
+        return _NULL_STAGE
+    timer = _stages.get(name)
+    if timer is None:
+        timer = _stages[name] = _Stage(_column(name))
+    return timer
+
+def record(stage_or_col, seconds: float):
+    """Add a measured duration to the current frame (also used by other threads, e.g. the OSC sender)."""
+    if not enabled or _frame < 0:
+        return
+    col = stage_or_col if isinstance(stage_or_col, int) else _column(stage_or_col)
+    row = _frame % CAPACITY
+    current = _ring[row, col]
+    _ring[row, col] = seconds if np.isnan(current) else current + seconds
+
+
+# ---------- Analysis ----------
+def _recorded_rows() -> np.ndarray:
+    """Ring rows holding finished frames, oldest first."""
+    rows = np.flatnonzero((_frame_ids >= 0) & (_frame_ids < _frame))
+    return rows[np.argsort(_frame_ids[rows])]
+
+def stats() -> list[tuple[str, float, float, float]]:
+    """(stage, p50, p95, max) in milliseconds over the frames in the ring. Frames where a stage didn't run are ignored."""
+    names = list(_stage_names)  # another thread may register a stage meanwhile
+    table = _ring[_recorded_rows(), :len(names)] * 1e3
+    result = []
+    for col, name in enumerate(names):
+        samples = table[:, col]
+        samples = samples[~np.isnan(samples)]
+        if samples.size:
+            p50, p95 = np.percentile(samples, [50, 95])
+            result.append((name, float(p50), float(p95), float(samples.max())))
+    return result
+
+def dump(path: str):
+    """Write the ring to .csv (one row per frame, ms per stage) or .json."""
+    names = list(_stage_names)
+    rows = _recorded_rows()
+    table = _ring[rows, :len(names)] * 1e3
+
+    if path.endswith(".json"):
+        frames = [
+            {"frame": int(_frame_ids[row]), **{n: float(ms) for n, ms in zip(names, values) if not np.isnan(ms)}}
+            for row, values in zip(rows, table)
+        ]
+        with open(path, "w") as f:
+            json.dump({"unit": "ms", "stages": names, "summary": stats(), "frames": frames}, f, indent=1)
+    else:
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame"] + [f"{n} (ms)" for n in names])
+            for row, values in zip(rows, table):
+                writer.writerow([int(_frame_ids[row])] + ["" if np.isnan(ms) else f"{ms:.4f}" for ms in values])
+    print(f"Profiler: wrote {len(rows)} frames to {path}")
+
+
+# ---------- Overlay ----------
+def draw_overlay():
+    """Small imgui window with p50/p95/max per stage and dump buttons."""
+    if not show_overlay:
+        return
+    import imgui # imported here so the profiler can be used without a UI
+
+    imgui.set_next_window_position(20, 20, imgui.FIRST_USE_EVER)
+    imgui.set_next_window_bg_alpha(0.85)
+    expanded, opened = imgui.begin("Frame profiler (F3)", closable=True, flags=imgui.WINDOW_ALWAYS_AUTO_RESIZE)
+    if expanded:
+        changed, on = imgui.checkbox("Record", enabled)
+        if changed:
+            set_enabled(on)
+
+        imgui.columns(4, "profiler_stats", border=False)
+        for text in ("stage", "p50 ms", "p95 ms", "max ms"):
+            imgui.text(text)
+            imgui.next_column()
+        imgui.separator()
+        for name, p50, p95, peak in stats():
+            imgui.text(name)
+            imgui.next_column()
+            for value in (p50, p95, peak):
+                imgui.text(f"{value:7.3f}")
+                imgui.next_column()
+        imgui.columns(1)
+
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        if imgui.button("Dump CSV"):
+            dump(f"profile-{stamp}.csv")
+        imgui.same_line()
+        if imgui.button("Dump JSON"):
+            dump(f"profile-{stamp}.json")
+    imgui.end()
+
+    if not opened:
+        toggle_overlay()
+
+def toggle_overlay():
+    """Show/hide the overlay; recording follows it."""
+    global show_overlay
+    show_overlay = not show_overlay
+    set_enabled(show_overlay)
@@ -0,0 +1,104 @@
+"""
+Slice field sampler: the preset at every point of an H x W grid over a slice.
+
+Uses the same math as state.get_unit_from_coordinates / state.from_unit, computed a
+band of rows at a time and written straight into memory-mapped .npy files, so
+fields far larger than RAM (1024 x 1024 x D) can be exported for batch synthesis
+or analysis. Next to <name>.npy (H, W, D) it writes <name>.mask.npy (H, W) bool,
+True where the point lies inside the unit hypercube, and <name>.json describing
+the grid.
+
+    python slice_field.py output.json field.npy --size 1024
+"""
+
+import os
+import json
+import argparse
+
+import numpy as np
+
+import state as S
+
+CHUNK_BYTES = 32 * 1024 * 1024  # float64 working set per band of rows
+EPSILON = 1e-9                  # same tolerance as state.is_point_valid
+
+
+def sidecar_paths(path: str) -> tuple[str, str]:
+    """(mask path, metadata path) that go with a field path."""
+    stem = path[:-4] if path.endswith(".npy") else path
+    return stem + ".mask.npy", stem + ".json"
+
+def slice_bounds(basis: np.ndarray = None, origin: np.ndarray = None) -> tuple[tuple[float, float], tuple[float, float]]:
+    """(u_range, v_range) of the bounding box of the slice polygon of basis/origin (default: the current slice)."""
+    verts = np.array(S.get_slice_polygon_vertices(basis, origin))
+    if verts.size == 0:
+        return (0.0, 1.0), (0.0, 1.0)
+    lo, hi = verts.min(axis=0), verts.max(axis=0)
+    return (float(lo[0]), float(hi[0])), (float(lo[1]), float(hi[1]))
+
+def sample_slice_field(path: str, height: int, width: int, u_range=None, v_range=None,
+                       basis: np.ndarray = None, origin: np.ndarray = None,
+                       dtype=np.float32, chunk_bytes: int = CHUNK_BYTES) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Sample the slice on a height x width grid and write it to path.
+    u_range, v_range: (min, max) plane coordinates covered, edges included; default the
+    whole slice polygon of basis/origin. Row 0 is the top (largest v), like the pad.
+    basis, origin: default to the current state.Basis / state.Slice_origin.
+    dtype: of the field on disk (float32 halves the file; computation is float64).
+    Returns the (field, mask) memory maps.
+    """
+    basis = np.asarray(S.Basis if basis is None else basis, dtype=float)
+    D = basis.shape[1]
+    if origin is None:
+        origin = S.Slice_origin if S.Slice_origin is not None else np.zeros(D)
+    origin = np.asarray(origin, dtype=float)
+    if u_range is None or v_range is None:
+        default_u, default_v = slice_bounds(basis, origin)
+        u_range = default_u if u_range is None else u_range
+        v_range = default_v if v_range is None else v_range
+
+    mask_path, meta_path = sidecar_paths(path)
+    field = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(height, width, D))
+    mask = np.lib.format.open_memmap(mask_path, mode="w+", dtype=bool, shape=(height, width))
+
+    us = np.linspace(u_range[0], u_range[1], width)
+    vs = np.linspace(v_range[1], v_range[0], height)
+    row_base = origin + us[:, None] * basis[0]  # (W, D) unit values along a row at v = 0
+
+    band = max(1, chunk_bytes // (width * D * 8))
+    for start in range(0, height, band):
+        v = vs[start:start + band]
+        unit = row_base[None, :, :] + v[:, None, None] * basis[1]  # (band, W, D)
+        mask[start:start + band] = ((unit >= -EPSILON) & (unit <= 1.0 + EPSILON)).all(axis=2)
+        field[start:start + band] = S.from_unit(unit, S.mins, S.maxs)
+
+    field.flush()
+    mask.flush()
+    with open(meta_path, "w") as f:
+        json.dump({
+            "shape": [height, width, D],
+            "u_range": [float(u) for u in u_range],
+            "v_range": [float(v) for v in v_range],
+            "param_names": list(S.param_names),
+            "basis": basis.tolist(),
+            "origin": origin.tolist(),
+        }, f)
+    return field, mask
+
+
+if __name__ == "__main__":
+    import dx7_bridge
+
+    parser = argparse.ArgumentParser(description="Export the PCA slice of a library as a dense parameter field.")
+    parser.add_argument("library", help="converted .json library, or .syx bank(s) / folder")
+    parser.add_argument("output", help="field .npy path (mask and metadata are written next to it)")
+    parser.add_argument("--size", type=int, default=1024, help="grid resolution (size x size)")
+    parser.add_argument("--float64", action="store_true", help="store the field as float64 instead of float32")
+    args = parser.parse_args()
+
+    dx7_bridge.load_dx7_library(args.library)
+    S.assign_pca_basis()
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    field, mask = sample_slice_field(args.output, args.size, args.size,
+                                     dtype=np.float64 if args.float64 else np.float32)
+    print(f"Wrote {field.shape} field to {args.output} ({np.count_nonzero(mask)} valid points)")
@@ -0,0 +1,152 @@
+"""
+Immutable, versioned snapshots of the explorer state for background threads.
+
+The UI mutates state.py in place; a thread reading those arrays could see a row
+half-written. Instead the main loop publishes a Snapshot once per frame and
+threads read state.snapshot, a single reference read that is atomic in CPython,
+so they never need a lock. Every array in a snapshot is read-only.
+
+Publishing is copy-on-write: the preset matrix is held as a tuple of row blocks,
+and only blocks containing rows marked dirty since the last publish are copied.
+Everything else is shared with the previous snapshot.
+"""
+
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+
+BLOCK_ROWS = 256  # rows per copy-on-write block
+
+
+def _frozen(array) -> np.ndarray | None:
+    """Read-only copy of array (None stays None)."""
+    if array is None:
+        return None
+    array = np.array(array, dtype=float)
+    array.setflags(write=False)
+    return array
+
+
+@dataclass(frozen=True, eq=False)
+class Snapshot:
+    version: int
+    param_names: tuple[str, ...]
+    preset_names: tuple[str, ...]
+    mins: np.ndarray                 # (D,)
+    maxs: np.ndarray                 # (D,)
+    basis: np.ndarray                # (2, D)
+    origin: np.ndarray | None        # (D,)
+    active: np.ndarray | None        # (D,) active preset value
+    blocks: tuple[np.ndarray, ...]   # preset rows, BLOCK_ROWS per block (the last may be shorter)
+
+    def __len__(self):
+        return len(self.preset_names)
+
+    def row(self, i: int) -> np.ndarray:
+        """Preset i, without assembling the whole matrix."""
+        return self.blocks[i // BLOCK_ROWS][i % BLOCK_ROWS]
+
+    @cached_property
+    def presets(self) -> np.ndarray:
+        """(V, D) read-only preset matrix, assembled on first use."""
+        if not self.blocks:
+            presets = np.zeros((0, len(self.param_names)))
+        else:
+            presets = np.concatenate(self.blocks)
+        presets.setflags(write=False)
+        return presets
+
+
+class SnapshotWriter:
+    """
+    Builds successive snapshots. Owned by the main thread: call mark_rows() for
+    edited preset rows, reset() when the matrix changes shape, then publish().
+    """
+    def __init__(self):
+        self.current: Snapshot | None = None
+        self._dirty_blocks: set[int] = set()
+        self._keys = {}  # what the small fields of current were copied from
+        self._version = 0  # keeps counting across reset()
+
+    def mark_rows(self, rows):
+        self._dirty_blocks.update((np.atleast_1d(rows) // BLOCK_ROWS).tolist())
+
+    def reset(self):
+        """Recopy everything on the next publish."""
+        self.current = None
+        self._dirty_blocks.clear()
+        self._keys = {}
+
+    def publish(self, presets, param_names, preset_names, mins, maxs, bounds_version,
+                basis, origin, basis_version, active, defer_rows: bool = False) -> Snapshot:
+        """
+        New snapshot if anything changed since the last one, else the last one.
+        defer_rows: keep publishing the previous preset rows and hold edits back until a
+        later publish (a drag rewriting thousands of scattered rows each frame would
+        otherwise copy most blocks every frame). Ignored if rows were added or resized.
+        """
+        prev = self.current
+        V, D = presets.shape
+        changed = prev is None
+
+        # Preset rows: copy dirty blocks and the blocks of appended rows, share the rest
+        resized = prev is None or bool(prev.blocks) and prev.blocks[0].shape[1] != D
+        if defer_rows and not resized and V == len(prev):
+            blocks, recopy = list(prev.blocks), set()  # _dirty_blocks stays pending
+        else:
+            if resized:
+                blocks, first_new = [], 0
+            else:
+                blocks = list(prev.blocks)
+                # Appended rows: recopy from the old last block, which may have grown
+                first_new = len(blocks) if V == len(prev) else len(prev) // BLOCK_ROWS
+                del blocks[first_new:]
+            n_blocks = -(-V // BLOCK_ROWS)
+            recopy = {b for b in self._dirty_blocks if b < first_new} | set(range(first_new, n_blocks))
+            for b in sorted(recopy):
+                block = presets[b * BLOCK_ROWS:(b + 1) * BLOCK_ROWS].copy()
+                block.setflags(write=False)
+                if b < len(blocks):
+                    blocks[b] = block
+                else:
+                    blocks.append(block)
+            self._dirty_blocks.clear()
+        changed |= bool(recopy)
+
+        # Small fields: recopied only when their source changed
+        keys = {
+            "params": len(param_names),
+            "names": len(preset_names),  # names are append-only
+            "bounds": bounds_version,
+            "basis": basis_version,
+        }
+        old = self._keys
+        fields = {}
+        if prev is not None:
+            fields = {name: getattr(prev, name) for name in ("param_names", "preset_names", "mins", "maxs", "basis", "origin")}
+        if old.get("params") != keys["params"]:
+            fields["param_names"] = tuple(param_names)
+        if old.get("names") != keys["names"]:
+            fields["preset_names"] = tuple(preset_names)
+        if old.get("bounds") != keys["bounds"]:
+            fields["mins"], fields["maxs"] = _frozen(mins), _frozen(maxs)
+        if old.get("basis") != keys["basis"]:
+            fields["basis"], fields["origin"] = _frozen(basis), _frozen(origin)
+        changed |= keys != old
+        self._keys = keys
+
+        # The active value is edited in place by the UI, so compare by value
+        prev_active = None if prev is None else prev.active
+        if active is None:
+            same = prev_active is None
+        else:
+            same = prev_active is not None and prev_active.shape == np.shape(active) and np.array_equal(prev_active, active)
+        fields["active"] = prev_active if same else _frozen(active)
+        changed |= not same
+
+        if not changed:
+            return prev
+        self._version += 1
+        self.current = Snapshot(version=self._version, blocks=tuple(blocks), **fields)
+        return self.current
@@ -0,0 +1,65 @@
+"""
+Screen-space spatial index for hit-testing preset nodes on the pad.
+"""
+
+import numpy as np
+
+
+class GridIndex:
+    """
+    Uniform grid hash over 2D points.
+    Points are sorted by the cell they fall in, so a query only touches
+    the few cells its circle overlaps instead of every point.
+    """
+    def __init__(self, cell_size: float = 16.0):
+        self.cell_size = float(cell_size)
+        self.count = 0
+        self._xs = np.zeros(0)
+        self._ys = np.zeros(0)
+        self._cell_keys = np.zeros(0, dtype=np.int64)  # sorted cell key per entry
+        self._order = np.zeros(0, dtype=np.int64)      # point index per entry
+
+    def _keys(self, cx, cy):
+        # Pack the two cell coordinates into one sortable integer.
+        # Far off-screen cells are clamped; they only ever collide with each other.
+        cx = np.clip(cx, -2**30, 2**30).astype(np.int64)
+        cy = np.clip(cy, -2**30, 2**30).astype(np.int64)
+        return (cx << 32) + (cy & 0xFFFFFFFF)
+
+    def build(self, xs: np.ndarray, ys: np.ndarray):
+        """(Re)build the index over the given screen coordinates. Non-finite points are left out."""
+        self._xs = np.asarray(xs, dtype=float)
+        self._ys = np.asarray(ys, dtype=float)
+        self.count = self._xs.shape[0]
+
+        finite = np.flatnonzero(np.isfinite(self._xs) & np.isfinite(self._ys))
+        cx = np.floor(self._xs[finite] / self.cell_size)
+        cy = np.floor(self._ys[finite] / self.cell_size)
+        keys = self._keys(cx, cy)
+
+        order = np.argsort(keys, kind="stable")
+        self._cell_keys = keys[order]
+        self._order = finite[order]
+
+    def query(self, x: float, y: float, radius: float) -> np.ndarray:
+        """Return indices of all points within radius of (x, y)."""
+        if self._order.size == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        cx0, cx1 = int(np.floor((x - radius) / self.cell_size)), int(np.floor((x + radius) / self.cell_size))
+        cy0, cy1 = int(np.floor((y - radius) / self.cell_size)), int(np.floor((y + radius) / self.cell_size))
+        cx, cy = np.meshgrid(np.arange(cx0, cx1 + 1), np.arange(cy0, cy1 + 1), indexing="ij")
+        cells = self._keys(cx.ravel(), cy.ravel())
+
+        starts = np.searchsorted(self._cell_keys, cells, side="left")
+        ends = np.searchsorted(self._cell_keys, cells, side="right")
+        candidates = np.concatenate([self._order[s:e] for s, e in zip(starts, ends) if e > s] or [self._order[:0]])
+
+        dx = self._xs[candidates] - x
+        dy = self._ys[candidates] - y
+        return candidates[dx * dx + dy * dy <= radius * radius]
+
+    def topmost(self, x: float, y: float, radius: float) -> int | None:
+        """Return the highest index (last drawn, so on top) within radius of (x, y), or None."""
+        hits = self.query(x, y, radius)
+        return int(hits.max()) if hits.size else None
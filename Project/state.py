@@ -5,26 +5,52 @@
 
 import numpy as np
 from random import randint
+from collections import deque
+from name_index import NameIndex
+from knn import BallIndex
+from history import Journal
+from snapshot import Snapshot, SnapshotWriter
 
 # ---------- core high-D data ---------- #
 
 # Parameter names: ["freq1", "freq2", ...]
 param_names: list[str] = [] # len D
+param_index: dict[str, int] = {} # name -> column in Presets, kept in sync with param_names
 
 # Per-parameter bounds
 mins: np.ndarray # shape (D,)
 maxs: np.ndarray # shape (D,)
+bounds_version: int = 0 # bumped whenever mins/maxs change (see set_bounds)
 
 # High-D vectors (presets)
 Presets: np.ndarray # shape (V, D) | [Preset Index] -> Preset vector
+storage_dtype = np.float64 # dtype of Presets and the unit-space cache (see set_float32)
 
 # 2D basis for the current slice
 Basis: np.ndarray # shape (2, D) | [Basis Vector Index "U,V"] -> Basis vector
 Slice_origin: np.ndarray | None = None # shape (D,) | Origin point of the slice in unit space
+basis_version: int = 0 # bumped whenever Basis/Slice_origin change, so derived data knows when to recompute
 
 # Names + colors per vector
 preset_names: list[str] = [] # len V
-preset_colors: list[tuple[int,int,int]] = []  # len V, RGB tuples
+preset_index: dict[str, int] = {} # name -> first preset with that name, kept in sync with preset_names
+preset_colors: np.ndarray # shape (V, 3) uint8 | [Preset Index] -> RGB
+preset_name_index = NameIndex() # substring search over preset_names, kept in sync by init_space/add_presets
+
+# Backing storage for Presets/preset_colors. Both are views onto the first V rows;
+# the rest is spare capacity so appends are amortized O(1) instead of a full copy.
+_preset_buffer: np.ndarray # shape (capacity, D)
+_color_buffer: np.ndarray  # shape (capacity, 3) uint8
+
+# Undo/redo of edits to Presets. Writers go through set_preset(s)/update_preset_parameter_index;
+# the UI groups everything done during one mouse gesture into a single step.
+journal = Journal(lambda: Presets)
+
+# Read-only copy of the state for background threads, republished once per frame by
+# publish_snapshot(). Threads read it as `snap = state.snapshot` (one atomic reference
+# read, no lock) and then use only snap. Unchanged preset rows are shared between versions.
+snapshot: Snapshot | None = None
+_snapshots = SnapshotWriter()
 
 # ---------- app / interaction state ----------
 
@@ -44,25 +70,77 @@ hovered_parameter_slider: int = -1  #
 active_preset_value: np.ndarray | None = None
 """active preset vector. Can be a non-saved one if exploring. Is a non-saved one if selection is empty."""
 
+# ---------- derived data caches ----------
+
+# Valid grid dots of the slice pad for one lattice range (see get_valid_grid_points)
+_grid_cache: dict = {"key": None, "u": None, "v": None}
+
+# Slice polygon for one basis_version (see get_slice_polygon_vertices)
+_polygon_cache: dict = {"key": None, "verts": []}
+
+# Projection of every preset onto the slice (see get_presets_on_plane).
+# Arrays are sized like _preset_buffer; only rows marked dirty by the mutation helpers
+# (plus newly appended ones) are recomputed, everything when the basis or bounds change.
+_projection: dict = {
+    "unit": None,      # (capacity, D) presets in unit space, storage_dtype (see get_unit_presets)
+    "sqnorm": None,    # (capacity,) squared norms of the unit rows
+    "plane": None,     # (capacity, 2) (u,v) coords on the slice
+    "dists": None,     # (capacity,) normalized distance to the slice
+    "rows": 0,         # leading rows that are up to date (apart from "dirty")
+    "dirty": set(),    # edited rows
+    "unit_key": None,  # (bounds_version, D, storage_dtype) of the unit rows
+    "plane_key": None, # basis_version of the plane coords
+    "operator": None,  # projection operator for one basis (see _plane_operator)
+    "operator_key": None,
+}
+NEAR_PLANE_TOLERANCE = 64.0 # rows this many float eps (relative) from the plane are projected exactly
+projection_version: int = 0 # bumped whenever get_presets_on_plane's output changes
+
+# Running sums over the unit rows of _projection, so the PCA view can be recomputed
+# without touching every preset. Updated from the same row deltas as the projection;
+# rows are folded in lazily (see _pca_flush), so neither a drag nor a load pays for them up front.
+_pca_stats: dict = {
+    "n": 0,
+    "rows": 0,         # leading unit rows counted in the sums
+    "sum": None,       # (D,) sum of unit rows
+    "scatter": None,   # (D, D) sum of outer products of unit rows
+    "stale": None,     # (capacity,) bool: row still counted with its value from "old_rows"
+    "old_ids": [],     # arrays of stale rows
+    "old_rows": [],    # their unit values as counted in the sums
+}
+RANDOMIZED_PCA_MIN_ELEMENTS = 2_000_000 # pca_basis switches to randomized SVD above this many V*D values
+
+# Nearest-neighbour index over the unit rows of _projection. Edits go into its overflow
+# buffer (via _mark_rows_dirty); it is rebuilt when that grows too large or the bounds change.
+_knn: dict = {
+    "index": None,     # knn.BallIndex
+    "rows": 0,         # leading preset rows the index knows about
+    "dirty": set(),    # rows edited since they were last inserted
+    "unit_key": None,  # _projection["unit_key"] the index was built for
+}
+
 # ---------- simple helpers ----------
 def init_space(dims: list[str], n_vectors: int = 0):
     """Initialize global space with given dimensions and optional empty vectors."""
-    global param_names, mins, maxs, Basis, Slice_origin, Presets, preset_names, preset_colors
+    global param_names, Basis, Slice_origin, Presets, preset_names, preset_colors, preset_name_index
+    global _preset_buffer, _color_buffer, basis_version, param_index, preset_index
     param_names = list(dims)
+    param_index = {}
+    for i, name in enumerate(param_names):
+        param_index.setdefault(name, i)
     D = len(param_names)
 
-    mins = np.zeros(D, dtype=float)
-    maxs = np.ones(D, dtype=float)
-    Presets = np.zeros((0, D), dtype=float)
+    set_bounds(np.zeros(D, dtype=float), np.ones(D, dtype=float))
 
-    if n_vectors > 0:
-        X = np.zeros((n_vectors, D), dtype=float)
-        preset_names = [f"vec{i}" for i in range(n_vectors)]
-        preset_colors = [(255,255,255)] * n_vectors
-    else:
-        X = np.zeros((0, D), dtype=float)
-        preset_names = []
-        preset_colors = []
+    _preset_buffer = np.zeros((n_vectors, D), dtype=storage_dtype)
+    _color_buffer = np.full((n_vectors, 3), 255, dtype=np.uint8)
+    Presets = _preset_buffer[:n_vectors]
+    preset_colors = _color_buffer[:n_vectors]
+    preset_names = [f"vec{i}" for i in range(n_vectors)]
+    preset_index = {name: i for i, name in enumerate(preset_names)}
+    journal.clear()
+    _snapshots.reset()
+    preset_name_index = NameIndex(preset_names)
 
     # default slice: first 2 dims if available
     if D >= 2:
@@ -73,10 +151,81 @@ def init_space(dims: list[str], n_vectors: int = 0):
     else:
         Basis = np.zeros((2, D), dtype=float)
         Slice_origin = np.zeros(D, dtype=float)
+    basis_version += 1
+
+def set_float32(enabled: bool = True):
+    """
+    Opt in to float32 storage for Presets and the unit-space cache: half the memory, and
+    half the bytes every full pass (projection, PCA) reads, at about 7 significant digits.
+    Can be called before or after loading; stored presets are converted.
+    """
+    global storage_dtype, _preset_buffer, Presets
+    dtype = np.float32 if enabled else np.float64
+    if dtype == storage_dtype:
+        return
+    storage_dtype = dtype
+
+    try:
+        old = _preset_buffer
+    except NameError:
+        return  # nothing stored yet; init_space allocates with the new dtype
+    _preset_buffer = old.astype(dtype)
+    Presets = _preset_buffer[:Presets.shape[0]]
+    _snapshots.reset()
+
+def set_bounds(new_mins: np.ndarray, new_maxs: np.ndarray):
+    """Replace the per-parameter bounds. Use this instead of assigning mins/maxs directly."""
+    global mins, maxs, bounds_version
+    mins = np.asarray(new_mins, dtype=float)
+    maxs = np.asarray(new_maxs, dtype=float)
+    bounds_version += 1
+
+def _reserve_presets(n_total: int):
+    """Make sure the preset buffers can hold n_total rows, doubling capacity when they can't."""
+    global _preset_buffer, _color_buffer
+    capacity, D = _preset_buffer.shape
+    if n_total <= capacity:
+        return
+
+    V = Presets.shape[0]
+    new_capacity = max(n_total, 2 * capacity, 16)
+
+    preset_buffer = np.zeros((new_capacity, D), dtype=_preset_buffer.dtype)
+    preset_buffer[:V] = _preset_buffer[:V]
+    color_buffer = np.full((new_capacity, 3), 255, dtype=np.uint8)
+    color_buffer[:V] = _color_buffer[:V]
+
+    _preset_buffer, _color_buffer = preset_buffer, color_buffer
+
+def add_presets(names: list[str], colors, values: np.ndarray) -> np.ndarray:
+    """
+    Append many presets in one go. Returns their indices.
+    colors: sequence of RGB tuples or a (k,3) array. values: (k,D) array in parameter units.
+    Like add_preset, the last appended preset becomes the selection.
+    """
+    global Presets, preset_colors, selection, active_preset_value
+    start = Presets.shape[0]
+    stop = start + len(names)
+    if stop == start:
+        return np.arange(start, stop)
+    values = np.asarray(values, dtype=float).reshape(len(names), -1)
+
+    _reserve_presets(stop)
+    _preset_buffer[start:stop] = values
+    _color_buffer[start:stop] = np.asarray(colors, dtype=np.uint8).reshape(-1, 3)
+    Presets = _preset_buffer[:stop]
+    preset_colors = _color_buffer[:stop]
+
+    preset_names.extend(name or f"vec{start + i}" for i, name in enumerate(names))
+    for i in range(start, stop):
+        preset_index.setdefault(preset_names[i], i)  # duplicates resolve to the first, like list.index
+    preset_name_index.add(preset_names[start:])
+    selection = {stop - 1}
+    active_preset_value = Presets[stop - 1].copy()
+    return np.arange(start, stop)
 
 def add_preset(name: str, color: tuple[int,int,int] = None, value: np.ndarray = None) -> int:
     """Append a new vector at the midpoint of each dimension. Returns its index."""
-    global Presets, selection, active_preset_value
     assert mins is not None and maxs is not None and Presets is not None
 
     if value is None:
@@ -86,36 +235,36 @@ def add_preset(name: str, color: tuple[int,int,int] = None, value: np.ndarray =
     if color is None:
         color = (randint(0, 255), randint(0, 255), randint(0, 255))
 
-    Presets = np.vstack([Presets, value])
-    idx = Presets.shape[0] - 1
-
-    preset_names.append(name or f"vec{idx}")
-    preset_colors.append(color or (255, 255, 255))
-    selection = {idx}
-    active_preset_value = Presets[idx, :]
-    return idx
+    return int(add_presets([name], [color], value)[0])
 
 
 def add_parameter(name: str, vmin: float = 0.0, vmax: float = 1.0):
     """Append a new dimension to all vectors and update mins/maxs/B."""
-    global param_names, mins, maxs, Presets, Basis, Slice_origin, active_preset_value
+    global param_names, Presets, Basis, Slice_origin, active_preset_value, _preset_buffer, basis_version
     param_names.append(name)
+    param_index.setdefault(name, len(param_names) - 1)
+    journal.clear()  # recorded columns no longer line up
+    _snapshots.reset()
     D_new = len(param_names)
 
     if mins is None or maxs is None:
-        mins = np.array([vmin], dtype=float)
-        maxs = np.array([vmax], dtype=float)
+        set_bounds(np.array([vmin], dtype=float), np.array([vmax], dtype=float))
     else:
-        mins = np.concatenate([mins, np.array([vmin], dtype=float)])
-        maxs = np.concatenate([maxs, np.array([vmax], dtype=float)])
+        set_bounds(np.concatenate([mins, np.array([vmin], dtype=float)]),
+                   np.concatenate([maxs, np.array([vmax], dtype=float)]))
 
     if Presets is None:
-        Presets = np.zeros((0, D_new), dtype=float)
+        _preset_buffer = np.zeros((0, D_new), dtype=storage_dtype)
+        Presets = _preset_buffer
     else:
+        # Rebuild the backing buffer one column wider, keeping its spare capacity
         N = Presets.shape[0]
         mid = (vmin + vmax) / 2.0
-        new_col = np.full((N, 1), mid, dtype=float)
-        Presets = np.hstack([Presets, new_col])
+        buffer = np.zeros((_preset_buffer.shape[0], D_new), dtype=_preset_buffer.dtype)
+        buffer[:, :-1] = _preset_buffer
+        buffer[:N, -1] = mid
+        _preset_buffer = buffer
+        Presets = _preset_buffer[:N]
 
     # grow basis with a 0 in new dim
     if Basis is None:
@@ -128,6 +277,7 @@ def add_parameter(name: str, vmin: float = 0.0, vmax: float = 1.0):
         Slice_origin = np.zeros(D_new, dtype=float)
     else:
         Slice_origin = np.concatenate([Slice_origin, [0.0]])
+    basis_version += 1
         
     if active_preset_value is not None:
         # extend active_preset_value by one dimension with the midpoint
@@ -160,109 +310,263 @@ def is_point_valid(u: float, v: float) -> bool:
     # Allow a tiny epsilon for floating point noise
     return np.all((p >= -1e-9) & (p <= 1.0 + 1e-9))
 
-def get_slice_polygon_vertices() -> list[tuple[float, float]]:
+def get_valid_grid_points(start_i: int, end_i: int, start_j: int, end_j: int, step: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return the (u, v) coords of the lattice points (i*step, j*step) that lie inside the unit hypercube.
+    Checked for the whole lattice at once and cached until the basis or the lattice range changes.
+    """
+    key = (basis_version, start_i, end_i, start_j, end_j, step)
+    if _grid_cache["key"] == key:
+        return _grid_cache["u"], _grid_cache["v"]
+
+    origin = Slice_origin if Slice_origin is not None else np.zeros(len(param_names))
+    us = np.arange(start_i, end_i + 1) * step
+    vs = np.arange(start_j, end_j + 1) * step
+    eps = 1e-9 # same tolerance as is_point_valid
+
+    # For each lattice column u, every parameter bounds v to an interval; intersect them all.
+    # x_k = origin[k] + u * Basis[0, k] + v * Basis[1, k]  must stay in [0, 1]
+    base = origin + us[:, None] * Basis[0]  # (nu, D) value at v = 0
+    b1 = Basis[1]
+    flat = b1 == 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lo = (-eps - base[:, ~flat]) / b1[~flat]
+        hi = (1.0 + eps - base[:, ~flat]) / b1[~flat]
+    rising = b1[~flat] > 0
+    v_min = np.where(rising, lo, hi).max(axis=1, initial=-np.inf)
+    v_max = np.where(rising, hi, lo).min(axis=1, initial=np.inf)
+
+    # Parameters that don't change along v are either always or never inside for that column
+    flat_ok = ((base[:, flat] >= -eps) & (base[:, flat] <= 1.0 + eps)).all(axis=1)
+
+    mask = flat_ok[:, None] & (vs >= v_min[:, None]) & (vs <= v_max[:, None])
+    iu, iv = np.nonzero(mask)
+
+    _grid_cache["key"] = key
+    _grid_cache["u"] = us[iu]
+    _grid_cache["v"] = vs[iv]
+    return _grid_cache["u"], _grid_cache["v"]
+
+def get_slice_polygon_vertices(basis: np.ndarray = None, origin: np.ndarray = None) -> list[tuple[float, float]]:
     """
     Calculate the polygon vertices (u, v) representing the intersection 
     of the current plane with the unit hypercube [0, 1]^D.
+    The polygon only depends on the basis, so it is cached on basis_version.
+    basis, origin: intersect another plane instead (not cached); origin defaults to zeros.
     """
+    if basis is not None:
+        basis = np.asarray(basis, dtype=float)
+        origin = np.zeros(basis.shape[1]) if origin is None else np.asarray(origin, dtype=float)
+        return _compute_slice_polygon(basis, origin)
     if Basis is None: return []
-    
+
+    if _polygon_cache["key"] != basis_version:
+        origin = Slice_origin if Slice_origin is not None else np.zeros(len(param_names))
+        _polygon_cache["verts"] = _compute_slice_polygon(Basis, origin)
+        _polygon_cache["key"] = basis_version
+    return _polygon_cache["verts"]
+
+def _compute_slice_polygon(basis: np.ndarray, origin: np.ndarray) -> list[tuple[float, float]]:
+    """Intersect the 2*D half-planes 0 <= x_k <= 1 of the plane origin + u*basis[0] + v*basis[1] in (u, v) space."""
+    D = basis.shape[1]
+
     # Start with a large box in (u, v) space
-    limit = np.sqrt(len(param_names)) * 2.0
-    poly = [(-limit, -limit), (limit, -limit), (limit, limit), (-limit, limit)]
-    
-    origin = Slice_origin if Slice_origin is not None else np.zeros(len(param_names))
-    
-    # Helper to clip polygon by line ax + by + c <= 0
-    def clip(poly_in, a, b, c):
-        new_poly = []
-        if not poly_in: return []
-        
-        for i in range(len(poly_in)):
-            curr = poly_in[i]
-            prev = poly_in[(i - 1) % len(poly_in)]
-            
-            curr_in = (a * curr[0] + b * curr[1] + c) <= 1e-9
-            prev_in = (a * prev[0] + b * prev[1] + c) <= 1e-9
-            
-            if curr_in:
-                if not prev_in:
-                    denom = (a * (prev[0] - curr[0]) + b * (prev[1] - curr[1]))
-                    if abs(denom) > 1e-12:
-                        t = (a * prev[0] + b * prev[1] + c) / denom
-                        inter_x = prev[0] + t * (curr[0] - prev[0])
-                        inter_y = prev[1] + t * (curr[1] - prev[1])
-                        new_poly.append((inter_x, inter_y))
-                new_poly.append(curr)
-            elif prev_in:
-                denom = (a * (prev[0] - curr[0]) + b * (prev[1] - curr[1]))
-                if abs(denom) > 1e-12:
-                    t = (a * prev[0] + b * prev[1] + c) / denom
-                    inter_x = prev[0] + t * (curr[0] - prev[0])
-                    inter_y = prev[1] + t * (curr[1] - prev[1])
-                    new_poly.append((inter_x, inter_y))
-                
-        return new_poly
-
-    # For each dimension k, clip against 0 <= x_k <= 1
-    # x_k = origin[k] + u * Basis[0, k] + v * Basis[1, k]
-    for k in range(len(param_names)):
-        b0 = Basis[0, k]
-        b1 = Basis[1, k]
-        o = origin[k]
-        
-        # Lower bound: x_k >= 0  =>  -x_k <= 0
-        # -o - u*b0 - v*b1 <= 0
-        poly = clip(poly, -b0, -b1, -o)
-        if not poly: return []
-        
-        # Upper bound: x_k <= 1  =>  x_k - 1 <= 0
-        # o + u*b0 + v*b1 - 1 <= 0
-        poly = clip(poly, b0, b1, o - 1.0)
-        if not poly: return []
-        
-    return poly
+    limit = np.sqrt(D) * 2.0
+
+    # Every constraint as a half-plane  a . (u, v) <= c
+    # x_k = origin[k] + u * basis[0, k] + v * basis[1, k]
+    # Lower bound: x_k >= 0  =>  -b_k . (u, v) <= origin[k]
+    # Upper bound: x_k <= 1  =>   b_k . (u, v) <= 1 - origin[k]
+    b = basis.T  # (D, 2)
+    box = np.array([[1.0, 0.0], [0.0, 1.0], [-1.0, 0.0], [0.0, -1.0]])
+    A = np.concatenate([-b, b, box])
+    c = np.concatenate([origin, 1.0 - origin, np.full(4, limit)])
+
+    # Parameters the plane doesn't move: either always satisfied or the slice is empty
+    norms = np.hypot(A[:, 0], A[:, 1])
+    degenerate = norms < 1e-12
+    if np.any(c[degenerate] < -1e-9):
+        return []
+    A = A[~degenerate] / norms[~degenerate, None] + 0.0  # + 0.0 turns -0.0 into 0.0 for arctan2
+    c = c[~degenerate] / norms[~degenerate]
+
+    # Sort by direction and keep only the tightest constraint for each direction
+    angles = np.arctan2(A[:, 1], A[:, 0])
+    order = np.lexsort((c, angles))
+    A, c, angles = A[order], c[order], angles[order]
+    keep = np.ones(len(c), dtype=bool)
+    keep[1:] = np.diff(angles) > 1e-12
+    A, c = A[keep], c[keep]
+
+    return _drop_repeated_vertices(_intersect_half_planes(A[:, 0].tolist(), A[:, 1].tolist(), c.tolist()))
+
+def _drop_repeated_vertices(verts: list[tuple[float, float]], eps: float = 1e-9) -> list[tuple[float, float]]:
+    """Collapse runs of (nearly) equal neighbouring vertices: every bound tight at a corner repeats that corner."""
+    kept = []
+    for u, v in verts:
+        if not kept or abs(u - kept[-1][0]) > eps or abs(v - kept[-1][1]) > eps:
+            kept.append((u, v))
+    # The polygon is closed, so the last vertex can repeat the first
+    while len(kept) > 1 and abs(kept[-1][0] - kept[0][0]) <= eps and abs(kept[-1][1] - kept[0][1]) <= eps:
+        kept.pop()
+    return kept
+
+def _intersect_half_planes(ax: list[float], ay: list[float], c: list[float]) -> list[tuple[float, float]]:
+    """
+    Intersection of half-planes ax*u + ay*v <= c, given sorted by normal angle with
+    unique directions. Standard deque sweep, O(n). Returns counter-clockwise vertices.
+    """
+    eps = 1e-9
+
+    def intersect(i, j):
+        det = ax[i] * ay[j] - ay[i] * ax[j]
+        return ((c[i] * ay[j] - c[j] * ay[i]) / det, (ax[i] * c[j] - ax[j] * c[i]) / det)
+
+    def outside(i, p):
+        return ax[i] * p[0] + ay[i] * p[1] - c[i] > eps
+
+    dq = deque()
+    for i in range(len(c)):
+        while len(dq) > 1 and outside(i, intersect(dq[-1], dq[-2])):
+            dq.pop()
+        while len(dq) > 1 and outside(i, intersect(dq[0], dq[1])):
+            dq.popleft()
+        if dq:
+            j = dq[-1]
+            if abs(ax[i] * ay[j] - ay[i] * ax[j]) < 1e-12:
+                # Opposite, parallel neighbours: nothing lies between them
+                return []
+        dq.append(i)
+
+    while len(dq) > 2 and outside(dq[0], intersect(dq[-1], dq[-2])):
+        dq.pop()
+    while len(dq) > 2 and outside(dq[-1], intersect(dq[0], dq[1])):
+        dq.popleft()
+
+    if len(dq) < 3:
+        return []
+    lines = list(dq)
+    return [intersect(lines[k], lines[(k + 1) % len(lines)]) for k in range(len(lines))]
+
+def _mark_rows_dirty(rows):
+    """Record preset rows whose values changed, so derived data refreshes only those rows."""
+    global active_preset_value
+    rows = np.atleast_1d(rows).tolist()
+    if len(selection) == 1 and active_preset_value is not None:
+        # active_preset_value is a copy of the selected preset; keep it current
+        idx = next(iter(selection))
+        if idx in rows:
+            active_preset_value = Presets[idx].copy()
+    _projection["dirty"].update(rows)
+    _knn["dirty"].update(rows)
+    _snapshots.mark_rows(rows)
+
+def set_preset(preset: int, value: np.ndarray):
+    """Overwrite a whole preset vector."""
+    assert Presets is not None
+    with journal.group():
+        journal.touch(preset)
+        Presets[preset, :] = value
+    _mark_rows_dirty(preset)
+
+def set_presets(presets: np.ndarray, values: np.ndarray):
+    """Overwrite several preset vectors at once; one undo step."""
+    assert Presets is not None
+    presets = np.atleast_1d(presets)
+    with journal.group():
+        journal.touch(presets)
+        Presets[presets, :] = values
+    _mark_rows_dirty(presets)
 
 def update_preset_parameter_index(preset: int, param: int, value: float):
     """Update a single parameter of a preset vector by numeric indices."""
     assert Presets is not None
-    Presets[preset, param] = value
+    with journal.group():
+        journal.touch(preset)
+        Presets[preset, param] = value
+    _mark_rows_dirty(preset)
+
+def undo() -> bool:
+    """Revert the last preset edit (a whole drag or bulk edit counts as one). Returns False if there was none."""
+    rows = journal.undo()
+    if rows is None:
+        return False
+    _mark_rows_dirty(rows)
+    return True
+
+def redo() -> bool:
+    """Re-apply the last undone edit. Returns False if there was none."""
+    rows = journal.redo()
+    if rows is None:
+        return False
+    _mark_rows_dirty(rows)
+    return True
+
+def publish_snapshot() -> Snapshot:
+    """
+    Publish the current state to background threads. Main thread only, once per frame.
+    While an undo group is open (mid-gesture) preset rows keep their values from before
+    it; they are published when it closes. Everything else is always current.
+    """
+    global snapshot
+    snapshot = _snapshots.publish(Presets, param_names, preset_names, mins, maxs, bounds_version,
+                                  Basis, Slice_origin, basis_version, active_preset_value,
+                                  defer_rows=journal.recording)
+    return snapshot
+
+def get_param_index(name: str) -> int:
+    """Column of the named parameter. O(1); raises ValueError for unknown names."""
+    try:
+        return param_index[name]
+    except KeyError:
+        raise ValueError(f"Unknown parameter '{name}'") from None
+
+def get_preset_index(name: str) -> int:
+    """Index of the (first) preset with this name. O(1); raises ValueError for unknown names."""
+    try:
+        return preset_index[name]
+    except KeyError:
+        raise ValueError(f"Unknown preset '{name}'") from None
 
 def update_preset_parameter(preset: str, param: str, value: float):
     """Update a single parameter of a preset vector by names."""
-    assert preset_names is not None and param_names is not None
-    update_preset_parameter_index(preset_names.index(preset), param_names.index(param), value)
+    update_preset_parameter_index(get_preset_index(preset), get_param_index(param), value)
 
-def clamp_movement(start: np.ndarray, end: np.ndarray) -> np.ndarray:
+def clamp_movement(start: np.ndarray, end: np.ndarray, shared: bool = False) -> np.ndarray:
     """
     Return the point on the segment [start, end] that is closest to end
     while remaining within the unit hypercube [0, 1]^D.
+    start, end: (D,) or (k, D) for k segments at once.
+    shared: stop every row at the same fraction of its segment (the smallest any row
+    allows), so a group moves rigidly; otherwise each row stops at its own boundary.
+    """
+    start = np.asarray(start, dtype=float)
+    direction = np.asarray(end, dtype=float) - start
+    return start + movement_limit(start, direction, shared) * direction
+
+def movement_limit(start: np.ndarray, direction: np.ndarray, shared: bool = False) -> np.ndarray:
     """
-    direction = end - start
-    t_max = 1.0
+    Largest t in [0, 1] that keeps start + t * direction inside the unit hypercube:
+    (k, 1) for (k, D) rows ((1,) for one vector), or a scalar if shared.
+    direction may be one (D,) vector shared by all rows.
+    """
+    start = np.asarray(start, dtype=float)
+    direction = np.asarray(direction, dtype=float)
     epsilon = 1e-9
-    
-    for i in range(len(start)):
-        d = direction[i]
-        s = start[i]
-        
-        if abs(d) < epsilon:
-            continue
-            
-        if d > 0:
-            # Moving towards 1
-            t = (1.0 - s) / d
-        else:
-            # Moving towards 0
-            t = (0.0 - s) / d
-            
-        if t < t_max:
-            # Find the smallest positive t that hits a boundary, assuming start is valid [0,1].
-            if t >= 0:
-                t_max = t
 
-    t_max = max(0.0, min(t_max, 1.0))
-    return start + t_max * direction
+    # Fraction of the segment at which each coordinate reaches the face it moves towards
+    room = np.where(direction > 0, 1.0 - start, start)
+    speed = np.abs(direction)
+    speed[speed < epsilon] = 0.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = room / speed
+    # Parameters that don't move, or faces behind the start (start is assumed valid), don't stop it
+    t[~(t >= 0)] = np.inf
+
+    t_max = np.clip(t.min(axis=-1, keepdims=True, initial=1.0), 0.0, 1.0)
+    if shared:
+        t_max = t_max.min(initial=1.0)
+    return t_max
 
 def update_preset_on_plane(preset: int, u: float, v: float):
     """Update the preset vector to lie on the current 2D plane at (u,v) coords."""
@@ -288,28 +592,195 @@ def update_preset_on_plane(preset: int, u: float, v: float):
     final_unit = clamp_movement(current_unit, target_unit)
     
     updated_point = from_unit(final_unit, mins, maxs)
-    Presets[preset, :] = updated_point
+    set_preset(preset, updated_point)
     
 def get_presets_on_plane() -> tuple[np.ndarray, np.ndarray]: # shape (V,2), (V,)
-    """Return all preset vectors projected onto the current 2D plane at (u,v) coords."""
+    """
+    Return all preset vectors projected onto the current 2D plane at (u,v) coords,
+    and their normalized distance to it. Served from a cache that only recomputes
+    edited rows; treat the returned arrays as read-only.
+    """
     assert Basis is not None and Presets is not None
-    unit_presets = to_unit(Presets, mins, maxs)
-    
+    _refresh_projection()
+    V = Presets.shape[0]
+    return _projection["plane"][:V], _projection["dists"][:V]
+
+def _project_exact(unit_presets: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(N,D) unit-space rows -> (N,2) plane coords and (N,) distances to the plane (unnormalized), in float64."""
     origin = Slice_origin if Slice_origin is not None else np.zeros(len(param_names))
     
     # Project relative to slice origin
     # P_proj = (P - Origin) . Basis^T
-    Presets_2D = (unit_presets - origin) @ Basis.T
+    relative = np.asarray(unit_presets, dtype=float) - origin
+    Presets_2D = relative @ Basis.T
     
     # Calculate distance to plane in unit space
     # P_on_plane = Origin + P_proj . Basis
-    projected_back = origin + Presets_2D @ Basis 
-    diff = unit_presets - projected_back
-    dists = np.linalg.norm(diff, axis=1)
+    diff = relative - Presets_2D @ Basis
+    return Presets_2D, np.linalg.norm(diff, axis=1)
+
+def _plane_operator():
+    """
+    The current slice as one (D, 3) matrix [Basis^T | origin] in storage_dtype, plus
+    origin . Basis^T, |origin|^2 and whether Basis is orthonormal. Cached per basis.
+    """
+    key = (basis_version, storage_dtype)
+    if _projection["operator_key"] != key:
+        D = len(param_names)
+        origin = Slice_origin if Slice_origin is not None else np.zeros(D)
+        operator = np.empty((D, 3), dtype=storage_dtype)
+        operator[:, :2] = Basis.T
+        operator[:, 2] = origin
+        orthonormal = bool(np.allclose(Basis @ Basis.T, np.eye(2), atol=1e-9))
+        _projection["operator"] = (operator, origin @ Basis.T, float(origin @ origin), orthonormal)
+        _projection["operator_key"] = key
+    return _projection["operator"]
+
+def _project_unit_rows(unit_presets: np.ndarray, sqnorms: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (N,D) unit-space rows and their squared norms -> (N,2) plane coords and (N,) normalized
+    distances to the plane.
+    One pass over the rows: a single matmul against [Basis^T | origin] gives the plane coords
+    and the dot with the origin, and Pythagoras gives the distance,
+    |p - o|^2 - |(p - o) B^T|^2 = |p|^2 - 2 p.o + |o|^2 - |uv|^2.
+    The expansion cancels badly close to the plane, so those rows are redone exactly.
+    """
+    operator, offset, origin_sq, orthonormal = _plane_operator()
+    if not orthonormal:
+        plane, dists = _project_exact(unit_presets)
+    else:
+        product = unit_presets @ operator                 # (N, 3)
+        plane = product[:, :2] - offset
+        dist_sq = sqnorms - 2.0 * product[:, 2] + origin_sq - (plane ** 2).sum(axis=1)
+        scale = sqnorms + origin_sq + 1.0
+        near = np.flatnonzero(dist_sq <= NEAR_PLANE_TOLERANCE * np.finfo(unit_presets.dtype).eps * scale)
+        dists = np.sqrt(np.maximum(dist_sq, 0.0))
+        if near.size:
+            plane[near], dists[near] = _project_exact(unit_presets[near])
+
     MAX_DIST = np.sqrt(len(param_names))  # max possible distance in unit space
     dists = np.clip(dists / MAX_DIST, 0.0, 1.0)  # normalize to 0..1
-    
-    return Presets_2D, dists
+    return plane, dists
+
+def _unit_rows_into(source: np.ndarray, out: np.ndarray):
+    """to_unit(source) written straight into out, without a temporary the size of source."""
+    span = np.where((maxs - mins) != 0, (maxs - mins), 1.0)
+    np.subtract(source, mins, out=out, casting="unsafe")
+    out /= span
+
+def _row_sqnorms(rows: np.ndarray) -> np.ndarray:
+    return np.einsum("ij,ij->i", rows, rows, dtype=float)
+
+def _refresh_projection():
+    """Bring the projection cache up to date with Presets, the bounds and the basis."""
+    global projection_version
+    cache = _projection
+    V, D = Presets.shape
+    capacity = _preset_buffer.shape[0]
+
+    if cache["unit_key"] != (bounds_version, D, storage_dtype):
+        # Bounds, dimensions or precision changed: every row has to be redone.
+        # The arrays are kept when they still fit, so a bounds change rewrites them in place.
+        if cache["unit"] is None or cache["unit"].shape != (capacity, D) or cache["unit"].dtype != storage_dtype:
+            cache["unit"] = np.empty((capacity, D), dtype=storage_dtype)
+            cache["sqnorm"] = np.empty(capacity)
+            cache["plane"] = np.empty((capacity, 2))
+            cache["dists"] = np.empty(capacity)
+        cache["rows"] = 0
+        cache["dirty"].clear()
+        cache["unit_key"] = (bounds_version, D, storage_dtype)
+        cache["plane_key"] = None
+        _pca_stats.update(n=0, rows=0, sum=np.zeros(D), scatter=np.zeros((D, D)), stale=np.zeros(capacity, dtype=bool),
+                          old_ids=[], old_rows=[])
+    elif cache["unit"].shape[0] != capacity:
+        # The preset buffer grew: grow alongside it, keeping the rows already computed
+        n = cache["rows"]
+        for name in ("unit", "sqnorm", "plane", "dists"):
+            grown = np.empty((capacity,) + cache[name].shape[1:], dtype=cache[name].dtype)
+            grown[:n] = cache[name][:n]
+            cache[name] = grown
+        stale = np.zeros(capacity, dtype=bool)
+        stale[:n] = _pca_stats["stale"][:n]
+        _pca_stats["stale"] = stale
+
+    start = cache["rows"]
+    dirty = np.fromiter(cache["dirty"], dtype=np.intp, count=len(cache["dirty"]))
+    dirty = dirty[dirty < start]
+    if start == V and dirty.size == 0 and cache["plane_key"] == basis_version:
+        return
+
+    # Unit space: edited rows and newly appended rows only
+    unit, sqnorm = cache["unit"], cache["sqnorm"]
+    new_rows = None
+    if dirty.size:
+        new_rows = to_unit(Presets[dirty], mins, maxs).astype(storage_dtype, copy=False)
+        _pca_defer(dirty)
+        unit[dirty] = new_rows
+        sqnorm[dirty] = _row_sqnorms(new_rows)
+    if start < V:
+        _unit_rows_into(Presets[start:V], unit[start:V])
+        sqnorm[start:V] = _row_sqnorms(unit[start:V])
+
+    if cache["plane_key"] != basis_version:
+        # New basis: project everything once
+        cache["plane"][:V], cache["dists"][:V] = _project_unit_rows(unit[:V], sqnorm[:V])
+        cache["plane_key"] = basis_version
+    else:
+        if dirty.size:
+            cache["plane"][dirty], cache["dists"][dirty] = _project_unit_rows(new_rows, sqnorm[dirty])
+        if start < V:
+            cache["plane"][start:V], cache["dists"][start:V] = _project_unit_rows(unit[start:V], sqnorm[start:V])
+
+    cache["rows"] = V
+    cache["dirty"].clear()
+    projection_version += 1
+
+def get_unit_presets() -> np.ndarray: # shape (V,D)
+    """
+    All presets in unit space, from the persistent cache the projection keeps current
+    (edited rows, new rows, bounds changes). A read-only view in storage_dtype; copy it
+    to keep it past later edits.
+    """
+    assert Presets is not None
+    _refresh_projection()
+    unit = _projection["unit"][:Presets.shape[0]].view()
+    unit.flags.writeable = False
+    return unit
+
+def rebuild_nearest_index():
+    """Build the nearest-preset index from scratch (done lazily by nearest_presets; call after a load to avoid the wait)."""
+    _refresh_projection()
+    V = Presets.shape[0]
+    _knn["index"] = BallIndex(_projection["unit"][:V])
+    _knn["rows"] = V
+    _knn["dirty"].clear()
+    _knn["unit_key"] = _projection["unit_key"]
+
+def nearest_presets(vector: np.ndarray, k: int = 5) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The k stored presets closest to vector (parameter units), compared in unit space.
+    Returns (indices, distances), nearest first.
+    """
+    assert Presets is not None
+    V = Presets.shape[0]
+    if V == 0 or k <= 0:
+        return np.zeros(0, dtype=int), np.zeros(0)
+
+    _refresh_projection()  # keeps the unit rows current
+    index = _knn["index"]
+    if index is None or _knn["unit_key"] != _projection["unit_key"] or index.needs_rebuild:
+        rebuild_nearest_index()
+        index = _knn["index"]
+    else:
+        # Edited rows and rows appended since the last query
+        known = _knn["rows"]
+        rows = [r for r in _knn["dirty"] if r < known] + list(range(known, V))
+        if rows:
+            index.insert(rows, _projection["unit"][rows])
+        _knn["rows"] = V
+        _knn["dirty"].clear()
+
+    return index.query(to_unit(np.asarray(vector, dtype=float), mins, maxs), min(k, V))
 
 def project_point_on_plane(point: np.ndarray) -> tuple[np.ndarray, np.ndarray]: # shape (V,D)
     """Return all preset vectors projected onto the current 2D plane at (u,v) coords."""
@@ -351,6 +822,9 @@ def from_unit(unit_preset:np.ndarray, mins, maxs):
 
 def pca_basis(points: np.ndarray, dim: int=2) -> np.ndarray:
     """Compute the top 'dim' principal components of the given points."""
+    V, D = points.shape
+    if V * D > RANDOMIZED_PCA_MIN_ELEMENTS and min(V, D) > 4 * dim:
+        return randomized_pca_basis(points, dim)
     # Center the points
     centered = points - np.mean(points, axis=0)
     # Compute covariance matrix
@@ -360,7 +834,78 @@ def pca_basis(points: np.ndarray, dim: int=2) -> np.ndarray:
     # Sort eigenvectors by eigenvalues in descending order
     sorted_indices = np.argsort(eigvals)[::-1]
     top_eigvecs = eigvecs[:, sorted_indices[:dim]]
-    return top_eigvecs.T  # Return as (dim, D)
+    return _fix_signs(top_eigvecs.T)  # Return as (dim, D)
+
+def randomized_pca_basis(points: np.ndarray, dim: int = 2, oversample: int = 10, power_iters: int = 3, seed: int = 0) -> np.ndarray:
+    """
+    Top 'dim' principal components by randomized truncated SVD (Halko et al.).
+    Only (V, dim+oversample) sketches are formed instead of the full D x D covariance.
+    """
+    centered = points - np.mean(points, axis=0)
+    rng = np.random.default_rng(seed)
+    sketch = centered @ rng.normal(size=(points.shape[1], dim + oversample))
+    for _ in range(power_iters):
+        # Power iterations sharpen the gap between leading and trailing components
+        sketch, _ = np.linalg.qr(sketch)
+        sketch, _ = np.linalg.qr(centered @ (centered.T @ sketch))
+    Q, _ = np.linalg.qr(sketch)
+    _, _, Vt = np.linalg.svd(Q.T @ centered, full_matrices=False)
+    return _fix_signs(Vt[:dim])
+
+def _fix_signs(components: np.ndarray) -> np.ndarray:
+    """Flip components so their largest entry is positive; keeps recomputed views from mirroring."""
+    idx = np.argmax(np.abs(components), axis=1)
+    signs = np.sign(components[np.arange(len(components)), idx])
+    signs[signs == 0] = 1.0
+    return components * signs[:, None]
+
+def _pca_update(unit_rows: np.ndarray, sign: float):
+    """Add (sign=1) or remove (sign=-1) unit rows from the running PCA statistics."""
+    if unit_rows.shape[0] == 0:
+        return
+    unit_rows = unit_rows.astype(float, copy=False)  # float32 storage still accumulates in float64
+    _pca_stats["n"] += sign * unit_rows.shape[0]
+    _pca_stats["sum"] += sign * unit_rows.sum(axis=0)
+    _pca_stats["scatter"] += sign * (unit_rows.T @ unit_rows)
+
+def _pca_defer(rows: np.ndarray):
+    """Remember what rows (about to be overwritten in the unit cache) count as in the PCA sums."""
+    stale = _pca_stats["stale"]
+    rows = rows[rows < _pca_stats["rows"]]  # rows not counted yet have nothing to take back
+    fresh = rows[~stale[rows]]
+    if fresh.size:
+        _pca_stats["old_ids"].append(fresh)
+        _pca_stats["old_rows"].append(_projection["unit"][fresh])
+        stale[fresh] = True
+
+def _pca_flush():
+    """Bring the PCA sums up to date: swap stale rows' old values for their current ones, add rows not counted yet."""
+    if _pca_stats["old_ids"]:
+        ids = np.concatenate(_pca_stats["old_ids"])
+        _pca_update(np.concatenate(_pca_stats["old_rows"]), -1.0)
+        _pca_update(_projection["unit"][ids], 1.0)
+        _pca_stats["stale"][ids] = False
+        _pca_stats["old_ids"] = []
+        _pca_stats["old_rows"] = []
+    counted, V = _pca_stats["rows"], _projection["rows"]
+    if counted < V:
+        _pca_update(_projection["unit"][counted:V], 1.0)
+        _pca_stats["rows"] = V
+
+def incremental_pca_basis(dim: int = 2) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Top 'dim' principal components and the mean of all presets in unit space, from the
+    running statistics the projection cache keeps up to date as presets change.
+    Costs O(D^2) however many presets there are. Returns (basis (dim, D), mean (D,)).
+    """
+    _refresh_projection()
+    _pca_flush()
+    n = _pca_stats["n"]
+    mean = _pca_stats["sum"] / max(n, 1)
+    cov = _pca_stats["scatter"] / max(n, 1) - np.outer(mean, mean)
+    eigvals, eigvecs = np.linalg.eigh(cov)
+    top = eigvecs[:, np.argsort(eigvals)[::-1][:dim]]
+    return _fix_signs(top.T), mean
 
 # Project to 2-D and back
 def project(unit_preset:np.ndarray, mins, maxs, basis:np.ndarray, origin:np.ndarray=None):
@@ -387,28 +932,37 @@ def get_slope_of_parameter_in_plane(param_idx: int) -> tuple[float,float]:
 
 # Build basis
 
+def set_basis(basis: np.ndarray, origin: np.ndarray | None = None):
+    """Replace the slice basis (and optionally its origin). Use this instead of assigning Basis directly."""
+    global Basis, Slice_origin, basis_version
+    Basis = basis
+    if origin is not None:
+        Slice_origin = origin
+    basis_version += 1
+
 def assign_parameters_to_basis(x_param: int, y_param: int):
-    global Basis, Slice_origin
     D = len(param_names)
-    Basis = np.zeros((2, D), float)
-    Basis[0, x_param] = 1.0
-    Basis[1, y_param] = 1.0
-    Slice_origin = np.zeros(D, float) # Axis views usually start at origin
+    basis = np.zeros((2, D), float)
+    basis[0, x_param] = 1.0
+    basis[1, y_param] = 1.0
+    set_basis(basis, np.zeros(D, float)) # Axis views usually start at origin
 
 # QR decomposition version
 def assign_basis_from_three_points(p1, p2, p3):
-    global Basis, Slice_origin
     A = np.stack([p2 - p1, p3 - p1], axis=1)  # (D,2)
     Q, R = np.linalg.qr(A)
-    Basis = Q.T  # (2,D), columns are orthonormal
-    Slice_origin = (p1 + p2 + p3) / 3.0  # Center the slice at the centroid of the three points
+    # (2,D), columns are orthonormal. Center the slice at the centroid of the three points
+    set_basis(Q.T, (p1 + p2 + p3) / 3.0)
     
+def assign_pca_basis():
+    """Point the slice at the two main directions of variation of all presets, through their mean."""
+    basis, mean = incremental_pca_basis(dim=2)
+    set_basis(basis, mean)
+
 def assign_basis_from_three_presets(presets: list[int]):
-    global Basis
-    unit_presets = to_unit(Presets, mins, maxs)
-    assign_basis_from_three_points(unit_presets[presets[0]], unit_presets[presets[1]], unit_presets[presets[2]])
+    unit_presets = get_unit_presets()[presets[:3]].astype(float)
+    assign_basis_from_three_points(unit_presets[0], unit_presets[1], unit_presets[2])
     
-import imgui
 def is_cursor_within_circle(circle_center, radius) -> bool:
     """Check if the cursor is within a circle defined by center and radius."""
     import globals as G
@@ -420,6 +974,7 @@ def is_cursor_within_circle(circle_center, radius) -> bool:
 
 def record_selection(idx: int):
     """Record the given preset index as selected."""
+    import imgui # imported here so state.py stays usable without a UI (benchmarks, tools)
     global selection, active_preset_value
     
     is_selected = idx in selection
@@ -431,4 +986,4 @@ def record_selection(idx: int):
             selection.add(idx)
     else:
         selection = {idx}
-        active_preset_value = Presets[idx, :]
\ No newline at end of file
+        active_preset_value = Presets[idx].copy()
\ No newline at end of file
@@ -0,0 +1,39 @@
+"""
+Startup cache of converted .json libraries (dx7_bridge.load_cache / save_cache).
+
+    cd Project
+    python -m pytest -q tests
+"""
+
+import os
+import shutil
+import sys
+
+import numpy as np
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+import state as S
+import dx7_bridge
+
+LIBRARY = os.path.join(PROJECT_DIR, "output.json")
+
+
+def test_float32_run_keeps_the_cache_at_full_precision(tmp_path):
+    library = str(tmp_path / "library.json")
+    shutil.copy(LIBRARY, library)
+    dx7_bridge.load_dx7_json(library, use_cache=False)
+    expected = np.array(S.Presets, dtype=np.float64)
+    assert not np.array_equal(expected, expected.astype(np.float32)), "library no longer exercises float32 rounding"
+
+    S.set_float32(True)
+    try:
+        dx7_bridge.load_dx7_json(library)  # parses and writes the cache
+    finally:
+        S.set_float32(False)
+    assert os.path.exists(dx7_bridge.get_cache_path(library))
+
+    dx7_bridge.load_dx7_json(library)  # float64 run restored from that cache
+    assert S.Presets.dtype == np.float64
+    np.testing.assert_array_equal(S.Presets, expected)